@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
+import copy
 import json
 import logging
 import os
 import tempfile
+import threading
+import time
 from datetime import timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 LOGGER = logging.getLogger(__name__)
 
@@ -33,7 +36,12 @@ def set_config_source(path: Path) -> None:
     CONFIG_PATH = Path(path).expanduser()
 
 
-def _atomic_write(path: Path, data: str) -> None:
+def _atomic_write(
+    path: Path,
+    data: str,
+    *,
+    before_replace: Optional[Callable[[Path], None]] = None,
+) -> None:
     directory = path.parent
     directory.mkdir(parents=True, exist_ok=True)
     with tempfile.NamedTemporaryFile("w", delete=False, dir=directory, encoding="utf-8") as tmp:
@@ -41,9 +49,68 @@ def _atomic_write(path: Path, data: str) -> None:
         tmp.flush()
         os.fsync(tmp.fileno())
         tmp_path = Path(tmp.name)
+    if before_replace is not None:
+        before_replace(tmp_path)
     os.replace(tmp_path, path)
 
 
+# -- config file change tracking ----------------------------------------------------
+# The app records the (mtime_ns, size) of every config file it writes in a
+# marker next to it, so watchers can tell its own saves from outside edits.
+_own_stamp: Optional[Tuple[int, int]] = None
+
+
+def config_stamp(path: Path | None = None) -> Optional[Tuple[int, int]]:
+    try:
+        st = Path(path or CONFIG_PATH).stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _saved_marker(path: Path) -> Path:
+    return path.with_name(f".{path.name}.saved")
+
+
+def saved_by_app(path: Path | None = None) -> bool:
+    """True when the config file is exactly as :func:`save_config_to_source` left it."""
+    path = Path(path or CONFIG_PATH)
+    try:
+        mtime_ns, size = _saved_marker(path).read_text(encoding="utf-8").split()
+    except (OSError, ValueError):
+        return False
+    return config_stamp(path) == (int(mtime_ns), int(size))
+
+
+def follow_config(on_reload: Callable[[], None], interval: float = 2.0) -> threading.Thread:
+    """Reload ``CFG`` whenever another process saves or edits the config file.
+
+    Saves made by this process are already applied and are skipped;
+    ``on_reload`` runs after each reload.
+    """
+
+    def _loop() -> None:
+        last = config_stamp()
+        while True:
+            time.sleep(interval)
+            current = config_stamp()
+            if current == last:
+                continue
+            last = current
+            if current is None or current == _own_stamp:
+                continue
+            LOGGER.info("Config %s changed; reloading", CONFIG_PATH)
+            try:
+                reload_config()
+                on_reload()
+            except Exception:
+                LOGGER.warning("Config reload failed", exc_info=True)
+
+    thread = threading.Thread(target=_loop, name="config-follow", daemon=True)
+    thread.start()
+    return thread
+
+
 def _load_structured(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
@@ -87,11 +154,11 @@ def _deep_update(base: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any
 
 
 def load_config(defaults: Dict[str, Any]) -> Dict[str, Any]:
+    # Deep copy: _deep_update writes into nested dicts, which must never be
+    # the defaults themselves or a key removed from the file would stick.
+    merged = copy.deepcopy(defaults)
     loaded = _load_structured(CONFIG_PATH)
-    if not loaded:
-        return defaults.copy()
-    merged = defaults.copy()
-    return _deep_update(merged, loaded)
+    return _deep_update(merged, loaded) if loaded else merged
 
 
 def save_config_to_source(new_data: Dict[str, Any], file_path: Path | None = None):
@@ -110,7 +177,18 @@ def save_config_to_source(new_data: Dict[str, Any], file_path: Path | None = Non
     except Exception:
         LOGGER.warning("Failed to dump config as YAML; falling back to JSON", exc_info=True)
         text = json.dumps(new_data, ensure_ascii=False, indent=2)
-    _atomic_write(file_path, text)
+    _atomic_write(file_path, text, before_replace=lambda tmp: _record_save(file_path, tmp))
+
+
+def _record_save(path: Path, tmp: Path) -> None:
+    # rename keeps the temp file's mtime, so its stamp is the final one.
+    global _own_stamp
+    stamp = config_stamp(tmp)
+    if stamp is None:
+        return
+    if path == CONFIG_PATH:
+        _own_stamp = stamp
+    _atomic_write(_saved_marker(path), f"{stamp[0]} {stamp[1]}\n")
 
 
 FRAME_LAYOUT_KEYS = (
@@ -184,7 +262,15 @@ FRAME_ORIENTATION_ALIASES = {
 
 
 DEFAULT_CFG: Dict[str, Any] = {
-    "server": {"port": 5320},
+    "server": {
+        "port": 5320,
+        "template_reload": True,
+        "workers": 2,
+        "threads": 8,
+        "timeout": 60,
+        "graceful_timeout": 20,
+        "reload_on_config_change": True,
+    },
     "frame": {
         "tz": "Asia/Seoul",
         "ical_url": "",
@@ -208,7 +294,79 @@ DEFAULT_CFG: Dict[str, Any] = {
         "include_entities": [],
     },
     "bus": {"city_code": "", "node_id": "", "key": ""},
-    "photos": {"album": "default"},
+    "photos": {
+        "album": "default",
+        "cache_dir": "",
+        "cache_max_bytes": 256 * 1024 * 1024,
+        "quality": 82,
+        "sizes": {},
+        "pregenerate": ["thumb"],
+        "pregenerate_layouts": True,
+        "catalog_path": "",
+        "catalog_full_scan": 3600,
+        "catalog_ready_timeout": 10,
+        "jobs": {"workers": 1, "max_pending": 256},
+        "max_pixels": 24_000_000,
+        "max_upload_bytes": 50 * 1024 * 1024,
+        "max_batch_bytes": 200 * 1024 * 1024,
+        "max_batch_files": 50,
+        "sendfile": {"mode": "", "photos_uri": "", "cache_uri": ""},
+        "playlist": {"seed": "", "window": 10, "preload": 3},
+    },
+    "compression": {
+        "enabled": True,
+        "min_size": 1024,
+        "gzip_level": 6,
+        "brotli_quality": 5,
+        "paths": ["/api/events", "/api/photos", "/api/home-devices", "/api/board-snapshot"],
+    },
+    "stream": {
+        "keepalive": 15,
+        "timeout": 20,
+        "max_clients": 0,
+        "intervals": {
+            "verse": 10,
+            "home-devices": 30,
+            "bus": 60,
+            "todo": 60,
+            "events": 300,
+            "weather": 600,
+            "air": 600,
+            "photos": 30,
+        },
+    },
+    "snapshot": {"deadline": 5, "deadlines": {}, "max_workers": 12},
+    "http": {
+        "timeout": 10,
+        "retries": 2,
+        "read_retries": 0,
+        "backoff": 0.5,
+        "max_per_host": 4,
+        "hosts": {"apis.data.go.kr": {"timeout": 7, "retries": 1}},
+    },
+    "cache": {
+        "backend": "memory",
+        "path": "",
+        "ical": {"ttl": 300, "max_entries": 6, "stale_ttl": 3600},
+        "weather": {"ttl": 600, "max_entries": 4, "stale_ttl": 1800},
+        "air": {"ttl": 600, "max_entries": 4, "stale_ttl": 1800},
+        "bus": {"ttl": 60, "max_entries": 4, "stale_ttl": 120},
+        "home_assistant": {"ttl": 30, "max_entries": 2, "stale_ttl": 60},
+    },
+    "refresh": {
+        "enabled": True,
+        "jitter": 0.1,
+        "backoff": 30,
+        "max_backoff": 900,
+        "intervals": {
+            "weather": 540,
+            "air": 540,
+            "bus": 50,
+            "calendars": 270,
+            "home_assistant": 25,
+            "photos": 60,
+        },
+    },
 }
 
 CFG: Dict[str, Any] = load_config(DEFAULT_CFG)
@@ -217,15 +375,46 @@ TZ = timezone(timedelta(hours=9)) if CFG["frame"].get("tz") == "Asia/Seoul" else
 TZ_NAME = "Asia/Seoul" if CFG["frame"].get("tz") == "Asia/Seoul" else "UTC"
 
 
-frame_cfg = CFG.setdefault("frame", {})
-if not isinstance(frame_cfg.get("calendars"), list):
-    frame_cfg["calendars"] = []
+def _normalize_cfg(cfg: Dict[str, Any]) -> None:
+    frame_cfg = cfg.setdefault("frame", {})
+    if not isinstance(frame_cfg.get("calendars"), list):
+        frame_cfg["calendars"] = []
 
-layout_cfg = frame_cfg.setdefault("layout", {})
-for orient, defaults in FRAME_LAYOUT_DEFAULTS.items():
-    orient_cfg = layout_cfg.setdefault(orient, {})
-    for key, value in defaults.items():
-        orient_cfg.setdefault(key, value)
+    layout_cfg = frame_cfg.setdefault("layout", {})
+    for orient, defaults in FRAME_LAYOUT_DEFAULTS.items():
+        orient_cfg = layout_cfg.setdefault(orient, {})
+        for key, value in defaults.items():
+            orient_cfg.setdefault(key, value)
+
+    if not frame_cfg["calendars"] and frame_cfg.get("ical_url"):
+        frame_cfg["calendars"] = [
+            {"url": frame_cfg.get("ical_url", ""), "color": "#4b6bff"}
+        ]
+
+    ha_cfg = cfg.setdefault("home_assistant", {})
+    if not isinstance(ha_cfg.get("include_domains"), list):
+        ha_cfg["include_domains"] = []
+    if not isinstance(ha_cfg.get("include_entities"), list):
+        ha_cfg["include_entities"] = []
+
+
+_normalize_cfg(CFG)
+
+
+def reload_config() -> Dict[str, Any]:
+    """Re-read the config file into ``CFG`` in place.
+
+    Modules hold references to ``CFG`` itself, so it is mutated rather than
+    rebound.  Used by gunicorn workers forked from a preloaded master, which
+    would otherwise keep the configuration the master imported at startup.
+    """
+    fresh = load_config(DEFAULT_CFG)
+    _normalize_cfg(fresh)
+    # Other threads keep reading CFG; never leave it empty in between.
+    for key in [key for key in CFG if key not in fresh]:
+        del CFG[key]
+    CFG.update(fresh)
+    return CFG
 
 
 def normalize_orientation(value: str | None) -> str:
@@ -301,17 +490,6 @@ def frame_layout_snapshot() -> Dict[str, Dict[str, int]]:
             snapshot[key] = get_layout_for_orientation(key)
     return snapshot
 
-if not frame_cfg["calendars"] and frame_cfg.get("ical_url"):
-    frame_cfg["calendars"] = [
-        {"url": frame_cfg.get("ical_url", ""), "color": "#4b6bff"}
-    ]
-
-ha_cfg = CFG.setdefault("home_assistant", {})
-if not isinstance(ha_cfg.get("include_domains"), list):
-    ha_cfg["include_domains"] = []
-if not isinstance(ha_cfg.get("include_entities"), list):
-    ha_cfg["include_entities"] = []
-
 
 def get_verse() -> str:
     if VERSE_PATH.exists():
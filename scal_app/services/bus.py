@@ -6,11 +6,13 @@ import re
 import xml.etree.ElementTree as ET
 from typing import Any, Dict, List, Optional, Set, Tuple
 
-import requests
-
 from urllib.parse import quote
 
 from ..config import CFG
+from .cache import get_cache
+from .http import upstream
+
+_bus_cache = get_cache("bus", ttl=60, max_entries=4, stale_ttl=120)
 
 
 def pick_text(elem: Optional[ET.Element], *names: str) -> str:
@@ -63,7 +65,7 @@ def get_bus_arrivals(
     *,
     dedup_by_route: bool = True,
     limit: int = 5,
-    timeout: int = 7,
+    timeout: Optional[float] = None,
 ) -> Dict[str, Any]:
     """Fetch arrival information from the TAGO open API."""
     if not (city_code and node_id and service_key_encoded):
@@ -74,7 +76,7 @@ def get_bus_arrivals(
         f"?serviceKey={quote(service_key_encoded)}&cityCode={quote(str(city_code))}&nodeId={quote(str(node_id))}"
     )
 
-    response = requests.get(url, timeout=timeout)
+    response = upstream.get(url, timeout=timeout)
     response.raise_for_status()
     root = ET.fromstring(response.text)
 
@@ -145,12 +147,22 @@ def get_bus_arrivals(
     return {"stop_name": stop_name, "items": items}
 
 
-def render_bus_box() -> Dict[str, Any]:
+def fetch_bus_arrivals(*, refresh: bool = False) -> Dict[str, Any]:
+    """Return arrivals for the configured stop through the bus cache."""
     config = CFG.get("bus", {}) or {}
     city = (config.get("city_code") or "").strip()
     node = (config.get("node_id") or "").strip()
     key = (config.get("key") or "").strip()
-    data = get_bus_arrivals(city, node, key, dedup_by_route=True, limit=5, timeout=7)
+    if not (city and node and key):
+        return get_bus_arrivals(city, node, key)
+    loader = lambda: get_bus_arrivals(city, node, key, dedup_by_route=True, limit=5)
+    if refresh:
+        return _bus_cache.refresh((city, node, key), loader)
+    return _bus_cache.get_or_load((city, node, key), loader)
+
+
+def render_bus_box() -> Dict[str, Any]:
+    data = fetch_bus_arrivals()
 
     if data.get("need_config"):
         return {
@@ -0,0 +1,298 @@
+"""Thread-safe TTL + LRU cache shared by the service modules."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from ..config import BASE, CFG
+from .cache_store import SQLiteStore, open_store
+from .singleflight import SingleFlight
+
+LOGGER = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def _store_key(key: Hashable) -> str:
+    # Keys carry request params (service keys, tokens); the shared file only
+    # ever sees their hash, the readable key stays in process memory.
+    text = json.dumps(key, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _approx_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "expires_at", "size")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float, size: int) -> None:
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.size = size
+
+
+class TTLCache:
+    """TTL cache with LRU eviction, optional byte cap and stale-while-revalidate.
+
+    Entries expire ``ttl`` seconds after being stored.  When ``stale_ttl`` is
+    set, :meth:`get_or_load` keeps serving an expired entry for that many extra
+    seconds while a background thread reloads it, so callers never block on
+    the upstream for a key that was recently warm.
+
+    With a shared ``store`` (see :mod:`.cache_store`) every write is mirrored
+    with set-if-newer semantics and local misses consult the store first, so
+    gunicorn workers reuse each other's upstream results.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        ttl: float,
+        max_entries: int = 128,
+        max_bytes: Optional[int] = None,
+        stale_ttl: float = 0.0,
+        sizeof: Callable[[Any], int] = _approx_size,
+        store: Optional[SQLiteStore] = None,
+    ) -> None:
+        self.name = name
+        self.ttl = float(ttl)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.stale_ttl = max(0.0, float(stale_ttl))
+        self._sizeof = sizeof
+        self._store = store
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._refreshing: set = set()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_hits = 0
+
+    # -- shared store -------------------------------------------------------
+    def _adopt_shared(self, key: Hashable) -> Optional[_Entry]:
+        """Pull a newer entry for ``key`` from the shared store, if any."""
+        if self._store is None:
+            return None
+        try:
+            record = self._store.get(self.name, _store_key(key))
+        except Exception:
+            LOGGER.warning("Shared cache read failed for %s", self.name, exc_info=True)
+            return None
+        if record is None:
+            return None
+        value, stored_at, expires_at = record
+        local = self._entries.get(key)
+        if local is not None and local.stored_at >= stored_at:
+            return None
+        self._put(key, value, stored_at, expires_at)
+        self.shared_hits += 1
+        return self._entries[key]
+
+    def _publish(self, key: Hashable, entry: _Entry) -> None:
+        if self._store is None:
+            return
+        try:
+            self._store.set_if_newer(
+                self.name, _store_key(key), entry.value, entry.stored_at, entry.expires_at
+            )
+        except Exception:
+            LOGGER.warning("Shared cache write failed for %s", self.name, exc_info=True)
+
+    # -- basic operations ---------------------------------------------------
+    def _lookup(self, key: Hashable, now: float, *, allow_stale: bool) -> Tuple[Any, bool]:
+        entry = self._entries.get(key)
+        if entry is None or now >= entry.expires_at:
+            entry = self._adopt_shared(key) or entry
+        if entry is None:
+            return _MISSING, False
+        if now < entry.expires_at:
+            self._entries.move_to_end(key)
+            return entry.value, False
+        if allow_stale and now < entry.expires_at + self.stale_ttl:
+            self._entries.move_to_end(key)
+            return entry.value, True
+        if now >= entry.expires_at + self.stale_ttl:
+            self._remove(key)
+        return _MISSING, False
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh value for ``key`` or ``default``."""
+        with self._lock:
+            value, _ = self._lookup(key, time.time(), allow_stale=False)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def _put(self, key: Hashable, value: Any, stored_at: float, expires_at: float) -> _Entry:
+        size = self._sizeof(value) if self.max_bytes else 0
+        if key in self._entries:
+            self._remove(key)
+        entry = _Entry(value, stored_at, expires_at, size)
+        self._entries[key] = entry
+        self._bytes += size
+        self._evict(protect=key)
+        return entry
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            entry = self._put(key, value, now, now + (self.ttl if ttl is None else float(ttl)))
+        self._publish(key, entry)
+
+    def invalidate(self, key: Hashable = _MISSING) -> None:
+        """Drop ``key`` (or every entry when called without arguments)."""
+        with self._lock:
+            if key is _MISSING:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+        if self._store is not None:
+            try:
+                self._store.delete(self.name, None if key is _MISSING else _store_key(key))
+            except Exception:
+                LOGGER.warning("Shared cache delete failed for %s", self.name, exc_info=True)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self, *, protect: Hashable) -> None:
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == protect:
+                break
+            self._remove(oldest)
+            self.evictions += 1
+
+    # -- loading ------------------------------------------------------------
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        *,
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Return the cached value, loading (or revalidating) it as needed."""
+        with self._lock:
+            value, stale = self._lookup(key, time.time(), allow_stale=True)
+            if value is not _MISSING:
+                if stale:
+                    self.stale_hits += 1
+                    self._revalidate(key, loader, ttl)
+                else:
+                    self.hits += 1
+                return value
+            self.misses += 1
+        return self.refresh(key, loader, ttl=ttl)
+
+    def refresh(self, key: Hashable, loader: Callable[[], Any], *, ttl: Optional[float] = None) -> Any:
+        """Load ``key`` now and store it, regardless of the current entry.
+
+        With a shared store, an entry another worker produced within the last
+        half TTL is adopted instead, so N workers refresh a source once.
+        """
+
+        def _load() -> Any:
+            if self._store is not None:
+                with self._lock:
+                    entry = self._adopt_shared(key)
+                    if entry is not None and time.time() - entry.stored_at < self.ttl / 2:
+                        return entry.value
+            loaded = loader()
+            self.set(key, loaded, ttl)
+            return loaded
+
+        # Concurrent loads for the same key share one upstream call.
+        value, _shared = self._flight.do(key, _load)
+        return value
+
+    def _revalidate(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        def _run() -> None:
+            try:
+                with self._lock:
+                    adopted = self._adopt_shared(key)
+                if adopted is not None and time.time() < adopted.expires_at:
+                    return
+                self.set(key, loader(), ttl)
+            except Exception:
+                LOGGER.warning("Background refresh of %s cache failed", self.name, exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, name=f"cache-{self.name}", daemon=True).start()
+
+    # -- observability ------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes if self.max_bytes else None,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self._flight.coalesced,
+                "shared_hits": self.shared_hits,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+            }
+
+
+_REGISTRY: Dict[str, TTLCache] = {}
+_STORE: Any = _MISSING
+
+
+def shared_store() -> Optional[SQLiteStore]:
+    """Return the backend selected by ``cache.backend`` (opened once)."""
+    global _STORE
+    if _STORE is _MISSING:
+        cfg = CFG.get("cache", {}) or {}
+        path = Path(cfg.get("path") or BASE / "cache.sqlite3").expanduser()
+        _STORE = open_store(str(cfg.get("backend") or "memory"), path)
+    return _STORE
+
+
+def get_cache(name: str, *, ttl: float, **defaults: Any) -> TTLCache:
+    """Return the named cache, built from ``cache.<name>`` config overrides."""
+    cache = _REGISTRY.get(name)
+    if cache is None:
+        options: Dict[str, Any] = {"ttl": ttl, **defaults}
+        overrides = (CFG.get("cache", {}) or {}).get(name)
+        if isinstance(overrides, dict):
+            options.update({k: v for k, v in overrides.items() if k in (
+                "ttl", "max_entries", "max_bytes", "stale_ttl",
+            )})
+        cache = TTLCache(name, store=shared_store(), **options)
+        _REGISTRY[name] = cache
+    return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in sorted(_REGISTRY.items())}
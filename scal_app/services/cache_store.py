@@ -0,0 +1,108 @@
+"""Shared cache backends that let several worker processes reuse one entry."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+Record = Tuple[Any, float, float]
+
+
+class SQLiteStore:
+    """Cache entries in a SQLite file opened in WAL mode.
+
+    Values are stored as JSON together with the time they were produced.
+    :meth:`set_if_newer` only overwrites a row when the incoming entry is
+    newer, so a worker that finished a slow fetch late cannot clobber a
+    fresher value written by another worker.  Connections are per thread and
+    reopened after ``fork()``.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        row = self._conn().execute(
+            "SELECT value, stored_at, expires_at FROM cache_entries"
+            " WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), float(row[1]), float(row[2])
+
+    def set_if_newer(
+        self, namespace: str, key: str, value: Any, stored_at: float, expires_at: float
+    ) -> bool:
+        cur = self._conn().execute(
+            "INSERT INTO cache_entries (namespace, key, value, stored_at, expires_at)"
+            " VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (namespace, key) DO UPDATE SET"
+            "  value = excluded.value,"
+            "  stored_at = excluded.stored_at,"
+            "  expires_at = excluded.expires_at"
+            " WHERE excluded.stored_at > cache_entries.stored_at",
+            (namespace, key, json.dumps(value, ensure_ascii=False), stored_at, expires_at),
+        )
+        return cur.rowcount > 0
+
+    def delete(self, namespace: str, key: Optional[str] = None) -> None:
+        if key is None:
+            self._conn().execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+        else:
+            self._conn().execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)
+            )
+
+    def purge(self, older_than: float) -> int:
+        """Remove entries that expired before ``older_than`` (epoch seconds)."""
+        cur = self._conn().execute(
+            "DELETE FROM cache_entries WHERE expires_at < ?", (older_than,)
+        )
+        return cur.rowcount
+
+
+def open_store(backend: str, path: Path) -> Optional[SQLiteStore]:
+    """Return the configured shared store, or ``None`` for process memory only."""
+    backend = (backend or "memory").strip().lower()
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        try:
+            store = SQLiteStore(path)
+            store.purge(time.time() - 86400)
+            return store
+        except Exception:
+            LOGGER.error("Failed to open shared cache at %s; using memory only", path, exc_info=True)
+            return None
+    LOGGER.warning("Unknown cache backend %r; using memory only", backend)
+    return None
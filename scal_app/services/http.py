@@ -0,0 +1,250 @@
+"""Shared, pooled HTTP client for upstream services.
+
+Every upstream call (OpenWeatherMap, TAGO, iCal hosts, Home Assistant) goes
+through one :class:`UpstreamClient`.  It keeps a keep-alive ``requests``
+session per host, bounds concurrent requests per host, applies the retry and
+timeout policy from the ``http`` config section and records per-host stats.
+Rate-limited hosts (429) are not retried; their ``Retry-After`` is honoured
+by failing further calls fast until it has passed.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..config import CFG
+from .singleflight import SingleFlight
+
+LOGGER = logging.getLogger(__name__)
+
+
+class UpstreamBusyError(requests.exceptions.ConnectionError):
+    """Raised when a host's concurrency limit stays saturated past the timeout."""
+
+
+class UpstreamRateLimitedError(UpstreamBusyError):
+    """Raised while a host's ``Retry-After`` from an earlier 429/503 is running."""
+
+
+# Back-off after a 429 that came without a usable Retry-After header.
+_DEFAULT_RETRY_AFTER = 60.0
+
+
+def _http_cfg() -> Dict[str, Any]:
+    return CFG.get("http", {}) or {}
+
+
+def _host_policy(host: str) -> Dict[str, Any]:
+    cfg = _http_cfg()
+    policy = {
+        "timeout": cfg.get("timeout", 10),
+        "retries": cfg.get("retries", 2),
+        "read_retries": cfg.get("read_retries", 0),
+        "backoff": cfg.get("backoff", 0.5),
+        "max_per_host": cfg.get("max_per_host", 4),
+    }
+    overrides = (cfg.get("hosts") or {}).get(host)
+    if isinstance(overrides, dict):
+        policy.update({k: v for k, v in overrides.items() if k in policy})
+    return policy
+
+
+class _HostPool:
+    __slots__ = (
+        "session", "semaphore", "timeout", "lock", "retry", "blocked_until",
+        "requests", "errors", "coalesced", "in_flight", "total_ms", "last_status", "last_error",
+    )
+
+    def __init__(self, host: str) -> None:
+        policy = _host_policy(host)
+        size = max(1, int(policy["max_per_host"]))
+        # A read timeout means the upstream may already have counted the
+        # call against its quota, and each retry can cost another full timeout.
+        retry = Retry(
+            total=max(0, int(policy["retries"])),
+            read=max(0, int(policy["read_retries"])),
+            backoff_factor=float(policy["backoff"]),
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+            # Never sleep out a Retry-After inside a widget refresh; see note_rate_limit.
+            respect_retry_after_header=False,
+        )
+        self.retry = retry
+        self.blocked_until = 0.0
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.semaphore = threading.BoundedSemaphore(size)
+        self.timeout = float(policy["timeout"])
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+        self.last_status: Optional[int] = None
+        self.last_error = ""
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "coalesced": self.coalesced,
+                "in_flight": self.in_flight,
+                "avg_ms": round(self.total_ms / self.requests, 1) if self.requests else None,
+                "last_status": self.last_status,
+                "last_error": self.last_error,
+                "retry_after": max(0.0, round(self.blocked_until - time.time(), 1)) or None,
+            }
+
+    def note_rate_limit(self, resp: requests.Response) -> None:
+        """Remember the back-off a 429 (or 503 with Retry-After) asked for."""
+        header = resp.headers.get("Retry-After")
+        if resp.status_code != 429 and not header:
+            return
+        delay = _DEFAULT_RETRY_AFTER
+        if header:
+            try:
+                delay = self.retry.parse_retry_after(header)
+            except Exception:
+                pass
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.time() + delay)
+
+
+class UpstreamClient:
+    """Per-host connection pools with bounded concurrency and stats."""
+
+    def __init__(self) -> None:
+        self._pools: Dict[str, _HostPool] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def _pool(self, host: str) -> _HostPool:
+        pool = self._pools.get(host)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(host)
+                if pool is None:
+                    pool = _HostPool(host)
+                    self._pools[host] = pool
+        return pool
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        timeout: Optional[float] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        host = urlsplit(url).netloc.lower()
+        pool = self._pool(host)
+        wait = pool.blocked_until - time.time()
+        if wait > 0:
+            raise UpstreamRateLimitedError(f"{host}: rate limited, retry after {wait:.0f}s")
+        timeout = pool.timeout if timeout is None else timeout
+        if not pool.semaphore.acquire(timeout=timeout):
+            with pool.lock:
+                pool.errors += 1
+                pool.last_error = "concurrency limit reached"
+            raise UpstreamBusyError(f"{host}: too many concurrent requests")
+        started = time.monotonic()
+        with pool.lock:
+            pool.in_flight += 1
+        try:
+            resp = pool.session.request(method, url, timeout=timeout, headers=headers, **kwargs)
+        except Exception as exc:
+            with pool.lock:
+                pool.errors += 1
+                pool.last_error = str(exc)
+            raise
+        else:
+            with pool.lock:
+                pool.last_status = resp.status_code
+                if resp.status_code >= 400:
+                    pool.errors += 1
+            if resp.status_code in (429, 503):
+                pool.note_rate_limit(resp)
+            return resp
+        finally:
+            elapsed = (time.monotonic() - started) * 1000
+            with pool.lock:
+                pool.in_flight -= 1
+                pool.requests += 1
+                pool.total_ms += elapsed
+            pool.semaphore.release()
+
+    def get(self, url: str, *, coalesce: bool = True, **kwargs: Any) -> requests.Response:
+        """GET ``url``; identical concurrent GETs share one upstream request."""
+        if not coalesce or kwargs.get("stream"):
+            return self.request("GET", url, **kwargs)
+        # Params may be nested (lists, dicts) and headers case-mixed; JSON
+        # gives a stable, hashable key for any of them.
+        key = json.dumps(
+            [url, kwargs.get("params"), kwargs.get("headers")], sort_keys=True, default=str
+        )
+
+        def _fetch() -> requests.Response:
+            resp = self.request("GET", url, **kwargs)
+            resp.content  # read the body so followers can share the response
+            return resp
+
+        resp, shared = self._flight.do(key, _fetch)
+        if shared:
+            pool = self._pool(urlsplit(url).netloc.lower())
+            with pool.lock:
+                pool.coalesced += 1
+        return resp
+
+    def bind(self, headers: Mapping[str, str]) -> "BoundClient":
+        """Return a session-like view that sends ``headers`` on every call."""
+        return BoundClient(self, headers)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: pool.snapshot() for host, pool in sorted(self._pools.items())}
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.session.close()
+
+
+class BoundClient:
+    """Minimal ``requests.Session`` stand-in backed by the shared pools."""
+
+    def __init__(self, client: UpstreamClient, headers: Mapping[str, str]) -> None:
+        self._client = client
+        self.headers = dict(headers)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        if method.upper() == "GET" and kwargs.get("json") is None:
+            kwargs.pop("json", None)
+            return self.get(url, **kwargs)
+        headers = dict(self.headers)
+        headers.update(kwargs.pop("headers", None) or {})
+        return self._client.request(method, url, headers=headers, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        headers = dict(self.headers)
+        headers.update(kwargs.pop("headers", None) or {})
+        return self._client.get(url, headers=headers, **kwargs)
+
+    def close(self) -> None:
+        """Connections belong to the shared pool; nothing to release."""
+
+
+upstream = UpstreamClient()
@@ -0,0 +1,555 @@
+"""SQLite index of the photo library so listings never walk the directory."""
+from __future__ import annotations
+
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from ..config import BASE, CFG, PHOTOS_DIR
+from .photos import PHOTO_EXTS, file_digest, read_placeholder
+
+LOGGER = logging.getLogger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS photos ("
+    " name TEXT PRIMARY KEY,"
+    " size INTEGER NOT NULL,"
+    " mtime_ns INTEGER NOT NULL,"
+    " width INTEGER,"
+    " height INTEGER,"
+    " orientation INTEGER,"
+    " hash TEXT,"
+    " source_hash TEXT,"
+    " placeholder TEXT,"
+    " album TEXT NOT NULL,"
+    " version INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS tombstones (name TEXT PRIMARY KEY, version INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS photos_version ON photos (version)",
+    "CREATE INDEX IF NOT EXISTS photos_album ON photos (album, name)",
+    "CREATE INDEX IF NOT EXISTS photos_hash ON photos (hash)",
+    "CREATE INDEX IF NOT EXISTS photos_source_hash ON photos (source_hash)",
+    "CREATE INDEX IF NOT EXISTS tombstones_version ON tombstones (version)",
+)
+
+# Per-photo fields of detailed listings, in ``_detail`` order.
+_DETAIL_COLUMNS = "name, width, height, orientation, size, hash, placeholder"
+# Hex digits of the content hash used as the ``?v=`` photo URL version.
+_VERSION_LENGTH = 12
+
+
+def content_version(digest: Optional[str]) -> Optional[str]:
+    """Short content version for photo URLs (``None`` when unknown)."""
+    return digest[:_VERSION_LENGTH] if digest else None
+
+
+# Deleted names remembered for delta listings; older clients get a full list.
+_TOMBSTONE_LIMIT = 2000
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def album_of(name: str) -> str:
+    """Album of a library path: its top-level folder, ``""`` for the root."""
+    head, sep, _rest = name.partition("/")
+    return head if sep else ""
+
+
+def _detail(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    name, width, height, orientation, size, digest, placeholder = row
+    return {
+        "name": name,
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "bytes": size,
+        "v": content_version(digest),
+        "placeholder": placeholder,
+    }
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _probe(
+    path: Path, *, placeholder: bool = True
+) -> Tuple[Optional[int], Optional[int], Optional[int], Optional[str]]:
+    """Return (width, height, exif orientation, placeholder) as displayed.
+
+    Dimensions come from the header; the placeholder (when asked for) is
+    decoded at a tiny DCT scale.
+    """
+    lqip = None
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            orientation = int(img.getexif().get(0x0112, 1) or 1)
+            if placeholder:
+                lqip = read_placeholder(img)
+    except Exception as exc:
+        LOGGER.warning("Could not read image %s: %s", path, exc)
+        return None, None, None, None
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+    return width, height, orientation, lqip
+
+
+class PhotoCatalog:
+    """Photo metadata kept in SQLite and updated incrementally.
+
+    The upload/rotate/delete endpoints call :meth:`upsert` / :meth:`remove`
+    directly.  :meth:`reconcile` picks up files changed behind our back (SFTP,
+    Samba) by re-listing only directories whose mtime moved since the last
+    pass; every ``full_scan`` seconds it stats every file instead, because a
+    file rewritten in place leaves its directory's mtime alone.  Every change
+    bumps a catalog-wide version counter; removals leave tombstones so
+    :meth:`changes_since` can describe a delta.  A random ``epoch``
+    identifies the database so versions from a recreated catalog are never
+    mistaken for old ones.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        root: Path,
+        *,
+        full_scan: float = 3600.0,
+        ready_timeout: float = 10.0,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.root = Path(root)
+        self.full_scan = float(full_scan)
+        self.ready_timeout = max(0.0, float(ready_timeout))
+        self._local = threading.local()
+        self._reconcile_lock = threading.Lock()
+        self._warmup_lock = threading.Lock()
+        self._warmup_pid: Optional[int] = None
+        self._warmed = threading.Event()
+        self._last_full_scan = 0.0
+        self._reconciled = False
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (secrets.token_hex(4),)
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    # -- versioning ---------------------------------------------------------
+    def _bump(self, conn: sqlite3.Connection) -> int:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('version', '1')"
+            " ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0])
+
+    def _meta_int(self, conn: sqlite3.Connection, key: str) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    @property
+    def version(self) -> int:
+        return self._meta_int(self._conn(), "version")
+
+    @property
+    def epoch(self) -> str:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()
+        return row[0] if row else ""
+
+    def _delete(self, conn: sqlite3.Connection, where: str, params: Tuple[Any, ...]) -> int:
+        """Delete matching rows inside the caller's transaction, leaving tombstones."""
+        names = [row[0] for row in conn.execute(f"SELECT name FROM photos WHERE {where}", params)]
+        if not names:
+            return 0
+        version = self._bump(conn)
+        conn.executemany(
+            "INSERT INTO tombstones (name, version) VALUES (?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET version = excluded.version",
+            [(name, version) for name in names],
+        )
+        conn.execute(f"DELETE FROM photos WHERE {where}", params)
+        return len(names)
+
+    def _prune_tombstones(self, conn: sqlite3.Connection) -> None:
+        row = conn.execute(
+            "SELECT version FROM tombstones ORDER BY version DESC LIMIT 1 OFFSET ?",
+            (_TOMBSTONE_LIMIT,),
+        ).fetchone()
+        if row is None:
+            return
+        with _transaction(conn):
+            conn.execute("DELETE FROM tombstones WHERE version <= ?", (row[0],))
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('tombstone_floor', ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (str(row[0]),),
+            )
+
+    def changes_since(
+        self, since: int, *, detail: bool = False, album: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return ``{"version", "added", "removed"}`` after version ``since``.
+
+        ``added`` also contains photos rewritten in place (rotations); with
+        ``detail`` its entries are dicts as in :meth:`listing`.  ``album``
+        limits both lists to one album.  Returns
+        ``None`` when ``since`` is too old (tombstones pruned) or from another
+        catalog, in which case the caller should send the full listing.
+        """
+        self.ensure_ready()
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            version = self._meta_int(conn, "version")
+            if since > version or since < self._meta_int(conn, "tombstone_floor"):
+                return None
+            where, params = ("", ()) if album is None else (" AND album = ?", (album,))
+            rows = conn.execute(
+                f"SELECT {_DETAIL_COLUMNS} FROM photos WHERE version > ?{where} ORDER BY name",
+                (since, *params),
+            ).fetchall()
+            removed = [row[0] for row in conn.execute(
+                "SELECT name FROM tombstones WHERE version > ? ORDER BY name", (since,)
+            ) if album is None or album_of(row[0]) == album]
+        finally:
+            conn.execute("COMMIT")
+        added = [_detail(row) if detail else row[0] for row in rows]
+        return {"version": version, "added": added, "removed": removed}
+
+    # -- queries ------------------------------------------------------------
+    def ensure_ready(self) -> None:
+        """Start the first reconcile of this process in the background.
+
+        Queries are answered from the existing index and the version moves
+        once the pass has caught up.  Only a catalog that has never finished
+        a reconcile (the very first start) makes them wait, for up to
+        ``ready_timeout`` seconds, so a full library is not listed as empty.
+        """
+        if self._reconciled:
+            return
+        with self._warmup_lock:
+            if self._warmup_pid != os.getpid():
+                self._warmup_pid = os.getpid()
+                self._warmed = threading.Event()
+                threading.Thread(target=self._warm_up, name="photo-catalog", daemon=True).start()
+            warmed = self._warmed
+        if not self._meta_int(self._conn(), "reconciled"):
+            warmed.wait(self.ready_timeout)
+
+    def _warm_up(self) -> None:
+        try:
+            if not self._reconciled:
+                self.reconcile()
+        except Exception:
+            LOGGER.warning("Initial photo catalog reconcile failed", exc_info=True)
+        finally:
+            self._warmed.set()
+
+    def names(self) -> List[str]:
+        return self.listing()[1]
+
+    def listing(
+        self, *, detail: bool = False, album: Optional[str] = None
+    ) -> Tuple[int, List[Any]]:
+        """Return ``(version, names)`` read from one consistent snapshot.
+
+        With ``detail`` each entry is ``{"name", "width", "height",
+        "orientation", "bytes", "v", "placeholder"}``; width/height are as
+        displayed (EXIF orientation applied), all probed once at ingest, and
+        ``v`` is the content version for immutable photo URLs.  ``album``
+        (see :func:`album_of`) restricts the listing to one album.
+        """
+        version, rows, _next = self.page(album=album, limit=None, detail=detail)
+        return version, rows
+
+    def page(
+        self,
+        *,
+        album: Optional[str] = None,
+        after: str = "",
+        limit: Optional[int] = 200,
+        detail: bool = False,
+    ) -> Tuple[int, List[Any], Optional[str]]:
+        """Return ``(version, entries, next)`` for names sorted after ``after``.
+
+        ``next`` is the cursor for the following page, ``None`` on the last.
+        Album pages are served from the ``(album, name)`` index.
+        """
+        self.ensure_ready()
+        clauses, params = ["name > ?"], [after]
+        if album is not None:
+            clauses.append("album = ?")
+            params.append(album)
+        sql = f"SELECT {_DETAIL_COLUMNS} FROM photos WHERE {' AND '.join(clauses)} ORDER BY name"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            version = self._meta_int(conn, "version")
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        following = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            following = rows[-1][0]
+        return version, [_detail(row) if detail else row[0] for row in rows], following
+
+    def details(self, names: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Detailed entries (as in :meth:`listing`) for ``names``, keyed by name."""
+        self.ensure_ready()
+        wanted = list(dict.fromkeys(names))
+        if not wanted:
+            return {}
+        rows = self._conn().execute(
+            f"SELECT {_DETAIL_COLUMNS} FROM photos WHERE name IN ({','.join('?' * len(wanted))})",
+            wanted,
+        ).fetchall()
+        return {row[0]: _detail(row) for row in rows}
+
+    def albums(self) -> List[Dict[str, Any]]:
+        """Albums with photo counts, including empty top-level folders."""
+        self.ensure_ready()
+        conn = self._conn()
+        found = {
+            album: {"name": album, "photos": count, "bytes": total}
+            for album, count, total in conn.execute(
+                "SELECT album, COUNT(*), COALESCE(SUM(size), 0) FROM photos GROUP BY album"
+            )
+        }
+        for (path,) in conn.execute(
+            "SELECT path FROM dirs WHERE path != '' AND instr(path, '/') = 0"
+        ):
+            found.setdefault(path, {"name": path, "photos": 0, "bytes": 0})
+        found.setdefault("", {"name": "", "photos": 0, "bytes": 0})
+        return [found[name] for name in sorted(found)]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        self.ensure_ready()
+        conn = self._conn()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute("SELECT * FROM photos WHERE name = ?", (name,)).fetchone()
+        finally:
+            conn.row_factory = None
+        return dict(row) if row else None
+
+    # -- incremental updates ------------------------------------------------
+    def _name(self, path: Path) -> str:
+        return Path(path).relative_to(self.root).as_posix()
+
+    def _upsert(
+        self,
+        conn: sqlite3.Connection,
+        path: Path,
+        st: os.stat_result,
+        source_hash: Optional[str] = None,
+        placeholder: Optional[str] = None,
+    ) -> None:
+        width, height, orientation, probed = _probe(path, placeholder=placeholder is None)
+        placeholder = placeholder or probed
+        digest = file_digest(path)
+        name = self._name(path)
+        with _transaction(conn):
+            version = self._bump(conn)
+            conn.execute("DELETE FROM tombstones WHERE name = ?", (name,))
+            conn.execute(
+                "INSERT INTO photos (name, size, mtime_ns, width, height, orientation, hash,"
+                "  source_hash, placeholder, album, version)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET size = excluded.size,"
+                "  mtime_ns = excluded.mtime_ns, width = excluded.width,"
+                "  height = excluded.height, orientation = excluded.orientation,"
+                "  hash = excluded.hash,"
+                "  source_hash = COALESCE(excluded.source_hash, photos.source_hash),"
+                "  placeholder = excluded.placeholder, version = excluded.version",
+                (
+                    name, st.st_size, st.st_mtime_ns, width, height, orientation, digest,
+                    source_hash, placeholder, album_of(name), version,
+                ),
+            )
+
+    def upsert(
+        self,
+        path: Path,
+        *,
+        source_hash: Optional[str] = None,
+        placeholder: Optional[str] = None,
+    ) -> None:
+        """Index (or re-index) a single photo after it was written.
+
+        ``source_hash`` is the hash of the file as uploaded, before
+        normalisation; it survives later rewrites such as rotations.
+        ``placeholder`` is a blur-up data URI the caller already computed;
+        without it one is decoded from the file.
+        """
+        path = Path(path)
+        self._upsert(self._conn(), path, path.stat(), source_hash, placeholder)
+
+    def find_by_hash(self, digest: str, *, album: Optional[str] = None) -> Optional[str]:
+        """Name of a photo whose uploaded or stored content hashes to ``digest``.
+
+        ``album`` limits the search to one album (see :func:`album_of`).
+        """
+        self.ensure_ready()
+        sql, params = "SELECT name FROM photos WHERE (source_hash = ? OR hash = ?)", [digest, digest]
+        if album is not None:
+            sql += " AND album = ?"
+            params.append(album)
+        row = self._conn().execute(sql + " LIMIT 1", params).fetchone()
+        return row[0] if row else None
+
+    def remove(self, path: Path) -> None:
+        conn = self._conn()
+        with _transaction(conn):
+            self._delete(conn, "name = ?", (self._name(path),))
+
+    # -- reconciliation -----------------------------------------------------
+    def _walk_changed(
+        self, known_dirs: Dict[str, int], *, full: bool = False
+    ) -> Iterator[Tuple[str, int]]:
+        """Yield (dir, mtime_ns) for every directory whose mtime changed (all with ``full``)."""
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime = directory.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            rel = "" if directory == self.root else self._name(directory)
+            if not full and known_dirs.get(rel) == mtime:
+                prefix = f"{rel}/" if rel else ""
+                stack.extend(
+                    self.root / d for d in known_dirs
+                    if d and d.startswith(prefix) and "/" not in d[len(prefix):]
+                )
+                continue
+            yield rel, mtime
+            try:
+                stack.extend(Path(e.path) for e in os.scandir(directory) if e.is_dir())
+            except FileNotFoundError:
+                continue
+
+    def reconcile(self, *, full: Optional[bool] = None) -> int:
+        """Sync the catalog with the photo directory; return the number of changes.
+
+        ``full`` forces (or suppresses) a scan of every directory; by default
+        the first pass of a process and one every ``full_scan`` seconds are full.
+        """
+        with self._reconcile_lock:
+            if full is None:
+                due = time.monotonic() - self._last_full_scan >= self.full_scan
+                full = due or not self._reconciled
+            conn = self._conn()
+            known_dirs = dict(conn.execute("SELECT path, mtime_ns FROM dirs").fetchall())
+            changes = 0
+            seen_dirs = set()
+            for rel, mtime in list(self._walk_changed(known_dirs, full=full)):
+                seen_dirs.add(rel)
+                changes += self._sync_dir(conn, rel)
+                conn.execute(
+                    "INSERT INTO dirs (path, mtime_ns) VALUES (?, ?)"
+                    " ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns",
+                    (rel, mtime),
+                )
+            for rel in known_dirs:
+                if rel not in seen_dirs and rel and not (self.root / rel).is_dir():
+                    conn.execute("DELETE FROM dirs WHERE path = ?", (rel,))
+                    changes += self._drop_prefix(conn, f"{rel}/")
+            self._prune_tombstones(conn)
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('reconciled', '1')")
+            if full:
+                self._last_full_scan = time.monotonic()
+            self._reconciled = True
+            if changes:
+                LOGGER.info("Photo catalog reconciled: %d change(s)", changes)
+            return changes
+
+    def _sync_dir(self, conn: sqlite3.Connection, rel: str) -> int:
+        directory = self.root / rel if rel else self.root
+        prefix = f"{rel}/" if rel else ""
+        indexed = {
+            name: (size, mtime)
+            for name, size, mtime in conn.execute(
+                "SELECT name, size, mtime_ns FROM photos WHERE name LIKE ? ESCAPE '\\'",
+                (_like_prefix(prefix),),
+            )
+            if "/" not in name[len(prefix):]
+        }
+        changes = 0
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if not entry.is_file() or Path(entry.name).suffix.lower() not in PHOTO_EXTS:
+                continue
+            name = prefix + entry.name
+            st = entry.stat()
+            if indexed.pop(name, None) == (st.st_size, st.st_mtime_ns):
+                continue
+            try:
+                self._upsert(conn, Path(entry.path), st)
+                changes += 1
+            except FileNotFoundError:
+                continue
+        if indexed:
+            with _transaction(conn):
+                for name in indexed:
+                    changes += self._delete(conn, "name = ?", (name,))
+        return changes
+
+    def _drop_prefix(self, conn: sqlite3.Connection, prefix: str) -> int:
+        with _transaction(conn):
+            return self._delete(conn, "name LIKE ? ESCAPE '\\'", (_like_prefix(prefix),))
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM photos").fetchone()
+        tombstones = conn.execute("SELECT COUNT(*) FROM tombstones").fetchone()[0]
+        return {"photos": count, "bytes": total, "version": self.version, "tombstones": tombstones}
+
+
+def _build_catalog() -> PhotoCatalog:
+    cfg = CFG.get("photos", {}) or {}
+    path = Path(cfg.get("catalog_path") or BASE / "photos.sqlite3").expanduser()
+    return PhotoCatalog(
+        path,
+        PHOTOS_DIR,
+        full_scan=float(cfg.get("catalog_full_scan", 3600)),
+        ready_timeout=float(cfg.get("catalog_ready_timeout", 10)),
+    )
+
+
+catalog = _build_catalog()
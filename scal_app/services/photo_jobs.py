@@ -0,0 +1,303 @@
+"""Bounded process-pool queue for Pillow work on uploads and rotations."""
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from ..config import BASE, CFG
+from .photos import derivatives, process_uploaded_photo, rotate_photo_file
+
+LOGGER = logging.getLogger(__name__)
+
+# Job records and staged files older than this are removed.
+_RETENTION = 86400.0
+# A "queued" record this old belongs to a worker that died mid-job.
+_STALE_AFTER = 600.0
+# Record fields find_active can match; each is an indexed column.
+_MATCH_FIELDS = ("filename", "source_hash", "album")
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    " id TEXT PRIMARY KEY,"
+    " status TEXT NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " filename TEXT,"
+    " source_hash TEXT,"
+    " album TEXT,"
+    " record TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS jobs_source_hash ON jobs (source_hash, status)",
+    "CREATE INDEX IF NOT EXISTS jobs_filename ON jobs (filename, status)",
+    "CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at)",
+)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when ``max_pending`` jobs are already waiting in this process."""
+
+
+# -- job bodies (run in the pool processes) --------------------------------------
+def run_upload_job(staged: str, pregenerate: Sequence[str]) -> Dict[str, Any]:
+    path = Path(staged)
+    stats = process_uploaded_photo(path)
+    derivatives.pregenerate(path, pregenerate)
+    return stats
+
+
+def run_rotate_job(source: str, staged: str, angle: int, pregenerate: Sequence[str]) -> Dict[str, Any]:
+    path = Path(staged)
+    shutil.copy2(source, path)
+    normalized = rotate_photo_file(path, angle)
+    derivatives.pregenerate(path, pregenerate)
+    return {"normalized_angle": normalized}
+
+
+def _mp_context():
+    # Pool processes are not forked from the (threaded) web worker directly.
+    for method in ("forkserver", "spawn"):
+        if method in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context(method)
+    return None
+
+
+class PhotoJobQueue:
+    """Run photo jobs in a small process pool and track them in SQLite.
+
+    Records live in ``jobs_dir/jobs.sqlite3`` (WAL) so any gunicorn worker
+    can answer a status query and :meth:`find_active` is an index lookup.
+    Inputs are written to ``staging_dir`` first; ``publish`` runs in
+    this process once the pool has finished, which is where the result is
+    moved into the photo library.  Clients therefore never see a
+    half-processed photo.
+    """
+
+    def __init__(
+        self,
+        jobs_dir: Path,
+        staging_dir: Path,
+        *,
+        workers: int = 1,
+        max_pending: int = 16,
+    ) -> None:
+        self.jobs_dir = Path(jobs_dir)
+        self.staging_dir = Path(staging_dir)
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_pid: Optional[int] = None
+        self._pending = 0
+        self._last_purge = 0.0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    # -- records ------------------------------------------------------------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "pid", None) == os.getpid():
+            return conn
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.jobs_dir / "jobs.sqlite3"), timeout=10.0, isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO jobs"
+            " (id, status, created_at, filename, source_hash, album, record)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                record["id"], record["status"], record["created_at"],
+                *(record.get(field) for field in _MATCH_FIELDS),
+                json.dumps(record, ensure_ascii=False),
+            ),
+        )
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not job_id.isalnum():
+            return None
+        row = self._conn().execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_active(self, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Return a queued job (from any worker) whose record matches ``fields``.
+
+        Only the indexed ``filename``, ``source_hash`` and ``album`` can be matched.
+        """
+        unknown = set(fields) - set(_MATCH_FIELDS)
+        if unknown:
+            raise ValueError(f"cannot match jobs on {sorted(unknown)}")
+        clauses = " ".join(f"AND {field} IS ?" for field in fields)
+        row = self._conn().execute(
+            f"SELECT record FROM jobs WHERE status = 'queued' AND created_at > ? {clauses} LIMIT 1",
+            (time.time() - _STALE_AFTER, *fields.values()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # -- submission ---------------------------------------------------------
+    @staticmethod
+    def new_id() -> str:
+        return secrets.token_hex(8)
+
+    def staging_path(self, job_id: str, filename: str) -> Path:
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        return self.staging_dir / f"{job_id}_{Path(filename).name}"
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def submit(
+        self,
+        job_id: str,
+        kind: str,
+        filename: str,
+        fn: Callable[..., Dict[str, Any]],
+        args: Tuple[Any, ...],
+        *,
+        publish: Callable[[Dict[str, Any]], None],
+        cleanup: Optional[Path] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Queue ``fn(*args)``; ``publish(result)`` runs here when it succeeds.
+
+        ``cleanup`` (the staged file) is removed once the job has settled;
+        ``meta`` is stored in the job record.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(f"{self._pending} photo jobs pending")
+            self._pending += 1
+        record = {
+            "id": job_id,
+            "kind": kind,
+            "filename": filename,
+            "status": "queued",
+            "created_at": time.time(),
+            "finished_at": None,
+            "error": "",
+            "result": {},
+            **(meta or {}),
+        }
+        self._write(record)
+        try:
+            with self._lock:
+                try:
+                    future = self._executor().submit(fn, *args)
+                except BrokenProcessPool:
+                    self._pool = None
+                    future = self._executor().submit(fn, *args)
+        except Exception as exc:
+            self._settle(record, None, exc, publish, cleanup)
+            raise
+        queued = dict(record)
+        future.add_done_callback(
+            lambda fut: self._finish(record, fut, publish, cleanup)
+        )
+        self._purge()
+        return queued
+
+    def _finish(
+        self,
+        record: Dict[str, Any],
+        future: Future,
+        publish: Callable[[Dict[str, Any]], None],
+        cleanup: Optional[Path],
+    ) -> None:
+        error = future.exception()
+        self._settle(record, None if error else future.result(), error, publish, cleanup)
+
+    def _settle(
+        self,
+        record: Dict[str, Any],
+        result: Optional[Dict[str, Any]],
+        error: Optional[BaseException],
+        publish: Callable[[Dict[str, Any]], None],
+        cleanup: Optional[Path],
+    ) -> None:
+        if error is None:
+            try:
+                publish(result or {})
+            except Exception as exc:
+                error = exc
+        if error is None:
+            record.update(status="done", result=result or {})
+            self.completed += 1
+        else:
+            LOGGER.warning("Photo job %s (%s) failed: %s", record["id"], record["kind"], error)
+            record.update(status="failed", error=str(error) or error.__class__.__name__)
+            self.failed += 1
+        record["finished_at"] = time.time()
+        if cleanup is not None:
+            try:
+                cleanup.unlink()
+            except FileNotFoundError:
+                pass
+        try:
+            self._write(record)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _purge(self) -> None:
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        self._conn().execute("DELETE FROM jobs WHERE created_at < ?", (now - _RETENTION,))
+        for path in self.staging_dir.glob("*"):
+            try:
+                if now - path.stat().st_mtime > _RETENTION:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+
+def _build_queue() -> PhotoJobQueue:
+    cfg = (CFG.get("photos", {}) or {}).get("jobs", {}) or {}
+    return PhotoJobQueue(
+        BASE / "photo_jobs",
+        BASE / "photo_staging",
+        workers=int(cfg.get("workers") or 1),
+        max_pending=int(cfg.get("max_pending", 256)),
+    )
+
+
+photo_jobs = _build_queue()
@@ -0,0 +1,668 @@
+"""Photo processing (Pillow) and the resized-derivative disk cache."""
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from ..config import BASE, CFG
+from .singleflight import SingleFlight
+
+LOGGER = logging.getLogger(__name__)
+
+PHOTO_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
+
+
+# -- frame normalisation --------------------------------------------------------
+def _pil_resample_lanczos():
+    """Return the best available LANCZOS resampling filter."""
+    resampling = getattr(Image, "Resampling", None)
+    if resampling is not None and hasattr(resampling, "LANCZOS"):
+        return resampling.LANCZOS
+    return getattr(Image, "LANCZOS")
+
+
+def _normalize_format(fmt: str) -> str:
+    fmt = (fmt or "").strip().upper()
+    if fmt == "JPG":
+        return "JPEG"
+    return fmt
+
+
+def _save_pil_image(img: Image.Image, dest: Path, img_format: str) -> None:
+    fmt = _normalize_format(img_format or dest.suffix.lstrip("."))
+    save_kwargs = {}
+    if fmt:
+        save_kwargs["format"] = fmt
+        if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+    img.save(dest, **save_kwargs)
+
+
+FRAME_CANVAS_WIDTH = 1080
+FRAME_CANVAS_HEIGHT = 1920
+
+
+def _frame_canvas_mode_and_fill(img: Image.Image) -> tuple[str, Any]:
+    mode = img.mode or "RGB"
+    if mode == "RGBA":
+        return "RGBA", (0, 0, 0, 0)
+    if mode == "LA":
+        return "LA", (0, 0)
+    if mode == "L":
+        return "L", 0
+    if mode == "P":
+        if "transparency" in getattr(img, "info", {}):
+            return "RGBA", (0, 0, 0, 0)
+        return "RGB", (0, 0, 0)
+    return "RGB", (0, 0, 0)
+
+
+def _fit_image_for_frame(img: Image.Image) -> Image.Image:
+    width, height = img.size
+    if width <= 0 or height <= 0:
+        return img
+
+    scale = min(
+        1.0,
+        FRAME_CANVAS_WIDTH / float(width),
+        FRAME_CANVAS_HEIGHT / float(height),
+    )
+
+    new_width = max(1, int(round(width * scale)))
+    new_height = max(1, int(round(height * scale)))
+    if (new_width, new_height) != (width, height):
+        img = img.resize((new_width, new_height), _pil_resample_lanczos())
+        width, height = img.size
+
+    if width == FRAME_CANVAS_WIDTH and height == FRAME_CANVAS_HEIGHT:
+        return img
+
+    canvas_mode, fill = _frame_canvas_mode_and_fill(img)
+    canvas = Image.new(canvas_mode, (FRAME_CANVAS_WIDTH, FRAME_CANVAS_HEIGHT), fill)
+    paste_img = img if img.mode == canvas_mode else img.convert(canvas_mode)
+    offset_x = (FRAME_CANVAS_WIDTH - width) // 2
+    offset_y = (FRAME_CANVAS_HEIGHT - height) // 2
+    canvas.paste(paste_img, (offset_x, offset_y))
+    return canvas
+
+
+# Longest edge of the inline blur-up placeholder (about 1 KB as a JPEG).
+PLACEHOLDER_EDGE = 32
+
+
+def placeholder_data_uri(img: Image.Image) -> str:
+    """Return a tiny JPEG ``data:`` URI of ``img`` (already upright)."""
+    small = img.copy()
+    small.thumbnail((PLACEHOLDER_EDGE, PLACEHOLDER_EDGE), getattr(Image, "Resampling", Image).BILINEAR)
+    if small.mode != "RGB":
+        small = small.convert("RGBA").convert("RGB")
+    buf = io.BytesIO()
+    small.save(buf, format="JPEG", quality=40, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def read_placeholder(img: Image.Image) -> str:
+    """Placeholder for an opened (not yet loaded) image, decoded at a tiny scale."""
+    img.draft("RGB", (PLACEHOLDER_EDGE * 2, PLACEHOLDER_EDGE * 2))
+    return placeholder_data_uri(ImageOps.exif_transpose(img))
+
+
+class PhotoTooLargeError(ValueError):
+    """The decoded image would exceed the ``photos.max_pixels`` budget."""
+
+
+_TRANSPOSE_FOR_ORIENTATION = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def _max_pixels() -> int:
+    return int((CFG.get("photos", {}) or {}).get("max_pixels") or 0)
+
+
+def _reset_peak_rss() -> bool:
+    """Restart this process's RSS high-water mark (Linux only).
+
+    ``ru_maxrss`` never goes down, so in a long-lived pool worker it says
+    nothing about the current photo; after a reset ``VmHWM`` does.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """``VmHWM`` of this process in KiB, or ``None`` without ``/proc``."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _frame_scale(width: int, height: int, orientation: int) -> float:
+    """Scale that fits a stored ``width x height`` image into the portrait canvas."""
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+    if width > height:
+        width, height = height, width
+    return min(1.0, FRAME_CANVAS_WIDTH / float(width), FRAME_CANVAS_HEIGHT / float(height))
+
+
+def _is_frame_ready(img: Image.Image, orientation: int) -> bool:
+    """True for a JPEG that already is the upright frame canvas.
+
+    The manager UI renders uploads exactly like the pipeline below
+    (orientation applied, landscape turned, letterboxed to 1080x1920), so
+    re-encoding such a file would only cost time and quality.
+    """
+    return (
+        img.format == "JPEG"
+        and img.mode in ("RGB", "L")
+        and orientation == 1
+        and img.size == (FRAME_CANVAS_WIDTH, FRAME_CANVAS_HEIGHT)
+    )
+
+
+def process_uploaded_photo(dest: Path) -> Dict[str, Any]:
+    """Normalize uploaded photos for the frame canvas.
+
+    JPEGs are decoded with libjpeg's DCT scaling straight to roughly twice
+    the final size, and the image is shrunk before it is transposed or
+    rotated, so a 50 MP upload never materialises at full resolution.
+    Anything that would still decode above ``photos.max_pixels`` is refused.
+    Frame-ready JPEGs (see :func:`_is_frame_ready`) are kept as uploaded.
+    Returns decode statistics including the process's peak RSS, plus the
+    blur-up ``placeholder`` computed from the final image.
+    """
+    if not dest.exists():
+        return {}
+
+    measured = _reset_peak_rss()
+    with Image.open(dest) as img:
+        source_size = img.size
+        orientation = int(img.getexif().get(_ORIENTATION_TAG, 1) or 1)
+        fast_path = _is_frame_ready(img, orientation)
+        if fast_path:
+            placeholder = read_placeholder(img)
+            decoded_size = img.size
+    if not fast_path:
+        decoded_size, placeholder = _normalize_for_frame(dest, orientation)
+
+    stats: Dict[str, Any] = {
+        "source_size": list(source_size),
+        "decoded_size": list(decoded_size),
+        "fast_path": fast_path,
+        "placeholder": placeholder,
+    }
+    peak = _peak_rss_kb() if measured else None
+    if peak is not None:
+        stats["peak_rss_kb"] = peak
+    LOGGER.info(
+        "Processed %s%s: %sx%s decoded as %sx%s, peak RSS during processing %s",
+        dest.name, " (frame-ready)" if fast_path else "", *source_size, *decoded_size,
+        "unknown" if peak is None else f"{peak / 1024.0:.1f} MB",
+    )
+    return stats
+
+
+def _normalize_for_frame(dest: Path, orientation: int) -> Tuple[Tuple[int, int], str]:
+    """Rewrite ``dest`` as the frame canvas; returns (decoded size, placeholder)."""
+    with Image.open(dest) as img:
+        original_format = img.format or dest.suffix.lstrip(".")
+        scale = _frame_scale(img.width, img.height, orientation)
+        target = (
+            max(1, int(round(img.width * scale))),
+            max(1, int(round(img.height * scale))),
+        )
+        img.draft(img.mode if img.mode in ("RGB", "L") else "RGB", (target[0] * 2, target[1] * 2))
+        budget = _max_pixels()
+        if budget and img.width * img.height > budget:
+            raise PhotoTooLargeError(
+                f"사진 해상도가 너무 큽니다 ({img.width * img.height / 1e6:.1f}MP,"
+                f" 최대 {budget / 1e6:.1f}MP)"
+            )
+        decoded_size = img.size
+        if img.size != target:
+            img = img.resize(target, _pil_resample_lanczos())
+        else:
+            img.load()
+
+        method = _TRANSPOSE_FOR_ORIENTATION.get(orientation)
+        if method is not None:
+            img = img.transpose(method)
+
+        width, height = img.size
+        if width > height:
+            img = img.rotate(90, expand=True)
+
+        img = _fit_image_for_frame(img)
+        _save_pil_image(img, dest, original_format)
+        return decoded_size, placeholder_data_uri(img)
+
+
+# EXIF orientation -> matrix (a, b, c, d) mapping stored pixels to display
+# coordinates (x right, y down).
+_ORIENTATION_MATRICES: Dict[int, Tuple[int, int, int, int]] = {
+    1: (1, 0, 0, 1),
+    2: (-1, 0, 0, 1),
+    3: (-1, 0, 0, -1),
+    4: (1, 0, 0, -1),
+    5: (0, 1, 1, 0),
+    6: (0, -1, 1, 0),
+    7: (0, -1, -1, 0),
+    8: (0, 1, -1, 0),
+}
+_MATRIX_ORIENTATIONS = {m: o for o, m in _ORIENTATION_MATRICES.items()}
+_ORIENTATION_TAG = 0x0112
+
+
+def _compose_orientation(orientation: int, angle: int) -> int:
+    """Orientation showing the current image turned ``angle`` degrees CCW."""
+    a, b, c, d = _ORIENTATION_MATRICES.get(orientation, _ORIENTATION_MATRICES[1])
+    for _ in range((angle // 90) % 4):
+        # 90 degrees counter-clockwise on screen: (x, y) -> (y, -x)
+        a, b, c, d = c, d, -a, -b
+    return _MATRIX_ORIENTATIONS[(a, b, c, d)]
+
+
+def _patch_tiff_orientation(data: bytearray, start: int, end: int, orientation: int) -> bool:
+    """Overwrite an existing IFD0 orientation entry in place."""
+    order = {b"II": "little", b"MM": "big"}.get(bytes(data[start:start + 2]))
+    if order is None or end - start < 8:
+        return False
+    ifd = start + int.from_bytes(data[start + 4:start + 8], order)
+    if ifd + 2 > end:
+        return False
+    for index in range(int.from_bytes(data[ifd:ifd + 2], order)):
+        entry = ifd + 2 + index * 12
+        if entry + 12 > end:
+            return False
+        if int.from_bytes(data[entry:entry + 2], order) != _ORIENTATION_TAG:
+            continue
+        if int.from_bytes(data[entry + 2:entry + 4], order) != 3:  # SHORT
+            return False
+        data[entry + 8:entry + 10] = orientation.to_bytes(2, order)
+        return True
+    return False
+
+
+def _exif_segment(tiff: bytes, orientation: int) -> Optional[bytes]:
+    exif = Image.Exif()
+    if tiff:
+        exif.load(tiff)
+    exif[_ORIENTATION_TAG] = orientation
+    payload = exif.tobytes()
+    if len(payload) + 2 > 0xFFFF:
+        return None
+    return b"\xff\xe1" + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def _rewrite_jpeg_orientation(path: Path, orientation: int) -> bool:
+    """Set the EXIF orientation of a JPEG without touching the image data."""
+    data = bytearray(path.read_bytes())
+    if data[:2] != b"\xff\xd8":
+        return False
+    pos = insert_at = 2
+    replaced = False
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker in (0xDA, 0xD9):  # start of scan / end of image
+            break
+        end = pos + 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+        if marker == 0xE0:
+            insert_at = end
+        elif marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+            if not _patch_tiff_orientation(data, pos + 10, end, orientation):
+                segment = _exif_segment(bytes(data[pos + 10:end]), orientation)
+                if segment is None:
+                    return False
+                data[pos:end] = segment
+            replaced = True
+            break
+        pos = end
+    if not replaced:
+        segment = _exif_segment(b"", orientation)
+        if segment is None:
+            return False
+        data[insert_at:insert_at] = segment
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(bytes(data))
+    os.replace(tmp, path)
+    return True
+
+
+def _rotate_jpeg_losslessly(dest: Path, normalized: int) -> bool:
+    """Rotate a frame-canvas JPEG by rewriting only its EXIF orientation."""
+    with Image.open(dest) as img:
+        if img.format != "JPEG" or img.size not in (
+            (FRAME_CANVAS_WIDTH, FRAME_CANVAS_HEIGHT),
+            (FRAME_CANVAS_HEIGHT, FRAME_CANVAS_WIDTH),
+        ):
+            return False
+        current = int(img.getexif().get(_ORIENTATION_TAG, 1) or 1)
+    try:
+        return _rewrite_jpeg_orientation(dest, _compose_orientation(current, normalized))
+    except (OSError, ValueError, KeyError):
+        LOGGER.warning("Lossless rotation failed for %s; re-encoding", dest, exc_info=True)
+        return False
+
+
+def rotate_photo_file(dest: Path, angle: int) -> int:
+    """Rotate photo file by multiples of 90 degrees and keep frame sizing.
+
+    Frame-canvas JPEGs (every normal upload) only get their EXIF orientation
+    rewritten, which is instant and lossless; other files are re-encoded.
+    """
+    if not dest.exists():
+        raise FileNotFoundError(dest)
+    normalized = angle % 360
+    if normalized and _rotate_jpeg_losslessly(dest, normalized):
+        return normalized
+    with Image.open(dest) as img:
+        original_format = img.format or dest.suffix.lstrip(".")
+        img = ImageOps.exif_transpose(img)
+        if normalized:
+            img = img.rotate(normalized, expand=True)
+        img = _fit_image_for_frame(img)
+        _save_pil_image(img, dest, original_format)
+    return normalized
+
+
+# -- derivatives ----------------------------------------------------------------
+DEFAULT_DERIVATIVE_SIZES: Dict[str, Tuple[int, int]] = {
+    "thumb": (360, 360),
+    "preview": (960, 960),
+    "frame": (FRAME_CANVAS_WIDTH, FRAME_CANVAS_HEIGHT),
+}
+
+# Layout variants: "fit-<W>x<H>-<pos x %>-<pos y %>", i.e. the photo contained
+# in a W x H canvas and placed like CSS ``object-position: x% y%``.
+_VARIANT_RE = re.compile(r"^fit-(\d{2,4})x(\d{2,4})-(\d{1,3})-(\d{1,3})$")
+
+
+def frame_variant(layout: Dict[str, Any]) -> str:
+    """Derivative size name rendering photos exactly for a frame ``layout``."""
+    return "fit-{}x{}-{}-{}".format(
+        int(layout.get("width") or FRAME_CANVAS_WIDTH),
+        int(layout.get("height") or FRAME_CANVAS_HEIGHT),
+        min(100, max(0, int(layout.get("bg_pos_x", 50)))),
+        min(100, max(0, int(layout.get("bg_pos_y", 50)))),
+    )
+
+
+def _parse_variant(name: str) -> Optional[Tuple[int, int, int, int]]:
+    match = _VARIANT_RE.match(name)
+    if match is None:
+        return None
+    width, height, pos_x, pos_y = (int(v) for v in match.groups())
+    if not (width and height) or pos_x > 100 or pos_y > 100:
+        return None
+    return width, height, pos_x, pos_y
+
+
+# Only bump a hit's mtime (the LRU clock) when it is older than this.
+_TOUCH_INTERVAL = 3600.0
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DerivativeStore:
+    """Resized JPEG copies of photos, addressed by source hash and size name.
+
+    A size is either a named bounding box (``sizes``) or a layout variant
+    from :func:`frame_variant`, which is rendered at exactly the frame's
+    display resolution so the browser never scales it.  Files live under
+    ``root/<hash[:2]>/<hash>_<size>.jpg`` so identical uploads share
+    derivatives and a rewritten photo (rotation) gets new ones
+    automatically.  File mtimes serve as the LRU clock; once the directory
+    grows past ``max_bytes`` the least recently used files are removed.
+    Sources that need no re-encoding are hard-linked into place (copied
+    across filesystems) so they are cache hits too.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        sizes: Dict[str, Tuple[int, int]],
+        max_bytes: int,
+        quality: int = 82,
+    ) -> None:
+        self.root = Path(root)
+        self.sizes = sizes
+        self.max_bytes = max(0, int(max_bytes))
+        self.quality = int(quality)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._bytes: Optional[int] = None
+        self.hits = 0
+        self.generated = 0
+        self.evicted = 0
+
+    def digest(self, source: Path) -> str:
+        """Content hash of ``source``, memoised on (size, mtime)."""
+        st = source.stat()
+        key = str(source)
+        with self._lock:
+            known = self._digests.get(key)
+        if known is not None and known[:2] == (st.st_size, st.st_mtime_ns):
+            return known[2]
+        value = file_digest(source)
+        with self._lock:
+            self._digests[key] = (st.st_size, st.st_mtime_ns, value)
+        return value
+
+    def path_for(self, digest: str, size: str) -> Path:
+        return self.root / digest[:2] / f"{digest}_{size}.jpg"
+
+    def supports(self, size: str) -> bool:
+        return size in self.sizes or _parse_variant(size) is not None
+
+    def get(self, source: Path, size: str, *, digest: Optional[str] = None) -> Path:
+        """Return a file to serve for ``source`` at ``size``.
+
+        The original is linked in when it is already a JPEG that fits the
+        requested box (or exactly matches a variant), so frame-sized uploads
+        are never re-encoded.  Pass a known ``digest`` (e.g. from the photo
+        catalog) to skip hashing.
+        """
+        variant = None if size in self.sizes else _parse_variant(size)
+        if variant is None and size not in self.sizes:
+            raise KeyError(size)
+        digest = digest or self.digest(source)
+        target = self.path_for(digest, size)
+        try:
+            st = target.stat()
+        except FileNotFoundError:
+            pass
+        else:
+            self.hits += 1
+            # A hard link shares the source's mtime; touching it would make
+            # the catalog think the photo changed.
+            if st.st_nlink == 1 and time.time() - st.st_mtime > _TOUCH_INTERVAL:
+                try:
+                    os.utime(target)
+                except OSError:
+                    pass
+            return target
+        if variant is not None:
+            build = lambda: self._render_variant(source, target, variant)  # noqa: E731
+        else:
+            build = lambda: self._generate(source, target, self.sizes[size])  # noqa: E731
+        result, _shared = self._flight.do((digest, size), build)
+        return result
+
+    def _write(self, img: Image.Image, target: Path) -> Path:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        img.save(tmp, format="JPEG", quality=self.quality, optimize=True)
+        os.replace(tmp, target)
+        self.generated += 1
+        self._account(target.stat().st_size)
+        return target
+
+    def _link(self, source: Path, target: Path) -> Path:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+        self._account(target.stat().st_size)
+        return target
+
+    def _render_variant(
+        self, source: Path, target: Path, variant: Tuple[int, int, int, int]
+    ) -> Path:
+        width, height, pos_x, pos_y = variant
+        with Image.open(source) as img:
+            if (
+                img.format == "JPEG"
+                and img.size == (width, height)
+                and img.getexif().get(0x0112, 1) == 1
+            ):
+                return self._link(source, target)
+            edge = max(width, height)
+            img.draft("RGB", (edge, edge))
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGBA").convert("RGB")
+            # Same geometry as CSS object-fit: contain + object-position.
+            img = ImageOps.contain(img, (width, height), _pil_resample_lanczos())
+            canvas = Image.new("RGB", (width, height), (0, 0, 0))
+            canvas.paste(
+                img,
+                (
+                    (width - img.width) * pos_x // 100,
+                    (height - img.height) * pos_y // 100,
+                ),
+            )
+        return self._write(canvas, target)
+
+    def _generate(self, source: Path, target: Path, box: Tuple[int, int]) -> Path:
+        with Image.open(source) as img:
+            if (
+                img.format == "JPEG"
+                and img.width <= box[0]
+                and img.height <= box[1]
+                and img.getexif().get(0x0112, 1) == 1
+            ):
+                return self._link(source, target)
+            # Decode JPEGs at a reduced DCT scale; the box is squared so the
+            # draft stays large enough after an EXIF rotation.
+            edge = max(box)
+            img.draft("RGB", (edge, edge))
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail(box, _pil_resample_lanczos())
+            img.load()
+        return self._write(img, target)
+
+    def pregenerate(self, source: Path, sizes: Iterable[str]) -> None:
+        for size in sizes:
+            if self.supports(size):
+                try:
+                    self.get(source, size)
+                except Exception:
+                    LOGGER.warning("Failed to pre-generate %s for %s", size, source, exc_info=True)
+
+    # -- disk budget --------------------------------------------------------
+    def _scan(self):
+        for path in self.root.glob("*/*.jpg"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            yield st.st_mtime, st.st_size, path
+
+    def _account(self, added: int) -> None:
+        if not self.max_bytes:
+            return
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._bytes += added
+            if self._bytes <= self.max_bytes:
+                return
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        floor = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= floor:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evicted += 1
+        self._bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "generated": self.generated,
+                "evicted": self.evicted,
+            }
+
+
+def _build_derivative_store() -> DerivativeStore:
+    cfg = CFG.get("photos", {}) or {}
+    sizes = dict(DEFAULT_DERIVATIVE_SIZES)
+    for name, box in (cfg.get("sizes") or {}).items():
+        try:
+            width, height = (int(v) for v in box)
+        except (TypeError, ValueError):
+            LOGGER.warning("Ignoring invalid photos.sizes.%s: %r", name, box)
+            continue
+        sizes[str(name)] = (max(1, width), max(1, height))
+    root = Path(cfg.get("cache_dir") or BASE / "photo_cache").expanduser()
+    return DerivativeStore(
+        root,
+        sizes=sizes,
+        max_bytes=int(cfg.get("cache_max_bytes", 256 * 1024 * 1024)),
+        quality=int(cfg.get("quality", 82)),
+    )
+
+
+derivatives = _build_derivative_store()
@@ -0,0 +1,56 @@
+"""Deterministic, seedable slideshow order over the photo catalog."""
+from __future__ import annotations
+
+import bisect
+import hashlib
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+
+def _key(seed: str, cycle: int, name: str) -> str:
+    return hashlib.sha1(f"{seed}\0{cycle}\0{name}".encode("utf-8")).hexdigest()[:16]
+
+
+@lru_cache(maxsize=16)
+def _order(seed: str, cycle: int, names: Tuple[str, ...]) -> List[Tuple[str, str]]:
+    """``(key, name)`` pairs of one cycle, sorted; reused while the catalog is unchanged."""
+    return sorted((_key(seed, cycle, name), name) for name in names)
+
+
+def parse_cursor(cursor: str) -> Tuple[int, str]:
+    """Split ``"<cycle>.<key>"``; anything malformed starts from the beginning."""
+    cycle, _, key = (cursor or "").partition(".")
+    try:
+        return max(0, int(cycle)), key
+    except ValueError:
+        return 0, ""
+
+
+def window(
+    names: Sequence[str],
+    *,
+    seed: str,
+    cursor: str,
+    count: int,
+) -> Tuple[List[str], str]:
+    """Return the next ``count`` names after ``cursor`` and the new cursor.
+
+    Each cycle orders photos by a hash of (seed, cycle, name): every frame
+    using the same seed walks the same sequence, every cycle is reshuffled,
+    and adding or removing photos does not disturb the rest of the order
+    because the cursor is a position in hash space, not an index.
+    """
+    cycle, after = parse_cursor(cursor)
+    items: List[str] = []
+    if not names:
+        return items, f"{cycle}.{after}"
+    names = tuple(names)
+    while len(items) < count:
+        ordered = _order(seed, cycle, names)
+        start = bisect.bisect_right(ordered, (after, "\U0010ffff")) if after else 0
+        for key, name in ordered[start:start + count - len(items)]:
+            items.append(name)
+            after = key
+        if len(items) < count:
+            cycle, after = cycle + 1, ""
+    return items, f"{cycle}.{after}"
@@ -0,0 +1,191 @@
+"""In-process refresh-ahead scheduler for widget data sources."""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import CFG
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+class _Job:
+    __slots__ = (
+        "name", "fn", "interval", "next_run", "running", "failures",
+        "last_run", "last_success", "last_error", "last_duration",
+    )
+
+    def __init__(self, name: str, fn: Callable[[], Any], interval: float) -> None:
+        self.name = name
+        self.fn = fn
+        self.interval = max(1.0, float(interval))
+        self.next_run = 0.0
+        self.running = False
+        self.failures = 0
+        self.last_run: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_error = ""
+        self.last_duration: Optional[float] = None
+
+
+class RefreshScheduler:
+    """Run refresh jobs on fixed intervals with jitter and failure backoff.
+
+    Each job reloads one data source into its cache shortly before the cached
+    entry would expire, so request handlers keep reading warm entries.  A
+    failing job is retried after ``backoff`` seconds, doubling per consecutive
+    failure up to ``max_backoff``; jobs never overlap with themselves.
+    """
+
+    def __init__(
+        self,
+        *,
+        jitter: float = 0.1,
+        backoff: float = 30.0,
+        max_backoff: float = 900.0,
+        workers: int = 4,
+    ) -> None:
+        self.jitter = max(0.0, float(jitter))
+        self.backoff = max(1.0, float(backoff))
+        self.max_backoff = max(1.0, float(max_backoff))
+        self._workers = max(1, int(workers))
+        self._jobs: Dict[str, _Job] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopping = False
+
+    def add_job(self, name: str, fn: Callable[[], Any], interval: float) -> None:
+        with self._cond:
+            self._jobs[name] = _Job(name, fn, interval)
+            self._cond.notify_all()
+
+    def _delay(self, job: _Job) -> float:
+        if job.failures:
+            return min(self.max_backoff, self.backoff * (2 ** (job.failures - 1)))
+        spread = job.interval * self.jitter
+        return max(1.0, job.interval + random.uniform(-spread, spread))
+
+    def _execute(self, job: _Job) -> None:
+        started = time.time()
+        try:
+            job.fn()
+        except Exception as exc:
+            LOGGER.warning("Refresh job %s failed: %s", job.name, exc)
+            with self._cond:
+                job.failures += 1
+                job.last_error = str(exc) or exc.__class__.__name__
+        else:
+            with self._cond:
+                job.failures = 0
+                job.last_error = ""
+                job.last_success = time.time()
+        finally:
+            with self._cond:
+                job.last_run = started
+                job.last_duration = time.time() - started
+                job.running = False
+                job.next_run = time.monotonic() + self._delay(job)
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                now = time.monotonic()
+                due: List[_Job] = [
+                    job for job in self._jobs.values() if not job.running and job.next_run <= now
+                ]
+                for job in due:
+                    job.running = True
+                if not due:
+                    pending = [job.next_run for job in self._jobs.values() if not job.running]
+                    wait = min(pending) - now if pending else 60.0
+                    self._cond.wait(timeout=max(0.1, wait))
+                    continue
+            for job in due:
+                assert self._executor is not None
+                self._executor.submit(self._execute, job)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="refresh"
+            )
+            self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def run_now(self, name: str) -> bool:
+        """Schedule ``name`` for immediate execution (e.g. after a config change)."""
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None:
+                return False
+            job.next_run = 0.0
+            self._cond.notify_all()
+            return True
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "running": self.running,
+                "jobs": {
+                    job.name: {
+                        "interval": job.interval,
+                        "running": job.running,
+                        "failures": job.failures,
+                        "last_run": _iso(job.last_run),
+                        "last_success": _iso(job.last_success),
+                        "last_error": job.last_error,
+                        "last_duration_ms": (
+                            int(job.last_duration * 1000) if job.last_duration is not None else None
+                        ),
+                        "next_run_in": round(max(0.0, job.next_run - now), 1),
+                    }
+                    for job in self._jobs.values()
+                },
+            }
+
+
+def build_scheduler(sources: Dict[str, Callable[[], Any]]) -> RefreshScheduler:
+    """Create a scheduler for ``sources`` using the ``refresh`` config section."""
+    cfg = CFG.get("refresh", {}) or {}
+    intervals = cfg.get("intervals", {}) or {}
+    scheduler = RefreshScheduler(
+        jitter=float(cfg.get("jitter", 0.1)),
+        backoff=float(cfg.get("backoff", 30)),
+        max_backoff=float(cfg.get("max_backoff", 900)),
+    )
+    for name, fn in sources.items():
+        interval = intervals.get(name)
+        if interval in (None, 0, False):
+            continue
+        scheduler.add_job(name, fn, float(interval))
+    return scheduler
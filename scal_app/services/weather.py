@@ -2,25 +2,20 @@
 from __future__ import annotations
 
 import collections
-import time
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
-import requests
-
 from ..config import CFG, TZ
+from .cache import get_cache
+from .http import upstream
 
-_weather_cache: Dict[str, Any] = {"key": "", "loc": "", "ts": 0.0, "data": None}
-_air_cache: Dict[str, Any] = {"key": "", "loc": "", "ts": 0.0, "data": None}
+_weather_cache = get_cache("weather", ttl=600, max_entries=4, stale_ttl=1800)
+_air_cache = get_cache("air", ttl=600, max_entries=4, stale_ttl=1800)
 
 
 def _owm_geocode(query: str, api_key: str) -> tuple[float, float]:
     url = "https://api.openweathermap.org/geo/1.0/direct"
-    response = requests.get(
-        url,
-        params={"q": query, "limit": 1, "appid": api_key},
-        timeout=10,
-    )
+    response = upstream.get(url, params={"q": query, "limit": 1, "appid": api_key})
     response.raise_for_status()
     items = response.json()
     if not items:
@@ -29,7 +24,7 @@ def _owm_geocode(query: str, api_key: str) -> tuple[float, float]:
 
 
 def _owm_fetch_onecall(lat: float, lon: float, key: str, units: str) -> Dict[str, Any]:
-    response = requests.get(
+    response = upstream.get(
         "https://api.openweathermap.org/data/3.0/onecall",
         params={
             "lat": lat,
@@ -38,7 +33,6 @@ def _owm_fetch_onecall(lat: float, lon: float, key: str, units: str) -> Dict[str
             "units": units,
             "exclude": "minutely,hourly,alerts",
         },
-        timeout=10,
     )
     response.raise_for_status()
     data = response.json()
@@ -77,15 +71,13 @@ def _owm_fetch_onecall(lat: float, lon: float, key: str, units: str) -> Dict[str
 
 
 def _owm_fetch_fiveday(lat: float, lon: float, key: str, units: str) -> Dict[str, Any]:
-    current = requests.get(
+    current = upstream.get(
         "https://api.openweathermap.org/data/2.5/weather",
         params={"lat": lat, "lon": lon, "appid": key, "units": units},
-        timeout=10,
     ).json()
-    forecast = requests.get(
+    forecast = upstream.get(
         "https://api.openweathermap.org/data/2.5/forecast",
         params={"lat": lat, "lon": lon, "appid": key, "units": units},
-        timeout=10,
     ).json()
 
     def icon_url(code: str) -> str:
@@ -137,53 +129,44 @@ def _owm_fetch_fiveday(lat: float, lon: float, key: str, units: str) -> Dict[str
     return {"current": current_data, "days": days}
 
 
-def fetch_weather() -> Optional[Dict[str, Any]]:
+def fetch_weather(*, refresh: bool = False) -> Optional[Dict[str, Any]]:
     config = CFG.get("weather", {})
     key = config.get("api_key", "").strip()
     location = config.get("location", "").strip()
     units = config.get("units", "metric")
     if not key or not location:
         return None
+    cache_key = (key, location, units)
+    loader = lambda: _load_weather(key, location, units)
+    if refresh:
+        return _weather_cache.refresh(cache_key, loader)
+    return _weather_cache.get_or_load(cache_key, loader)
 
-    now = time.time()
-    cache_ok = (
-        _weather_cache["data"] is not None
-        and _weather_cache["key"] == key
-        and _weather_cache["loc"] == location
-        and now - _weather_cache["ts"] < 600
-    )
-    if cache_ok:
-        return _weather_cache["data"]
 
+def _load_weather(key: str, location: str, units: str) -> Dict[str, Any]:
     lat, lon = _owm_geocode(location, key)
     try:
-        data = _owm_fetch_onecall(lat, lon, key, units)
+        return _owm_fetch_onecall(lat, lon, key, units)
     except Exception:
-        data = _owm_fetch_fiveday(lat, lon, key, units)
-    _weather_cache.update({"key": key, "loc": location, "ts": now, "data": data})
-    return data
+        return _owm_fetch_fiveday(lat, lon, key, units)
 
 
-def fetch_air_quality() -> Optional[Dict[str, Any]]:
+def fetch_air_quality(*, refresh: bool = False) -> Optional[Dict[str, Any]]:
     config = CFG.get("weather", {})
     key = config.get("api_key", "").strip()
     location = config.get("location", "").strip()
     if not key or not location:
         return None
+    loader = lambda: _load_air_quality(key, location)
+    if refresh:
+        return _air_cache.refresh((key, location), loader)
+    return _air_cache.get_or_load((key, location), loader)
 
-    now = time.time()
-    cache_ok = (
-        _air_cache["data"] is not None
-        and _air_cache["key"] == key
-        and _air_cache["loc"] == location
-        and now - _air_cache["ts"] < 600
-    )
-    if cache_ok:
-        return _air_cache["data"]
 
+def _load_air_quality(key: str, location: str) -> Dict[str, Any]:
     lat, lon = _owm_geocode(location, key)
     url = "https://api.openweathermap.org/data/2.5/air_pollution"
-    response = requests.get(url, params={"lat": lat, "lon": lon, "appid": key}, timeout=10)
+    response = upstream.get(url, params={"lat": lat, "lon": lon, "appid": key})
     response.raise_for_status()
     data = response.json()
     first = (data.get("list") or [{}])[0]
@@ -200,5 +183,4 @@ def fetch_air_quality() -> Optional[Dict[str, Any]]:
         value = components.get(key_name)
         if value is not None:
             result[key_name] = value
-    _air_cache.update({"key": key, "loc": location, "ts": now, "data": result})
     return result
@@ -1,13 +1,22 @@
 """Template loaders for the smart frame web UI."""
 from __future__ import annotations
 
+import hashlib
+import threading
 from pathlib import Path
+from typing import Any, Callable, Dict, Optional
 
 PACKAGE_DIR = Path(__file__).resolve().parent
 BOARD_TEMPLATE_PATH = PACKAGE_DIR / "board.html"
 SETTINGS_TEMPLATE_PATH = PACKAGE_DIR / "settings.html"
 MAIN_TEMPLATE_PATH = PACKAGE_DIR / "main.html"
 
+PAGE_TEMPLATE_PATHS: Dict[str, Path] = {
+    "board": BOARD_TEMPLATE_PATH,
+    "settings": SETTINGS_TEMPLATE_PATH,
+    "main": MAIN_TEMPLATE_PATH,
+}
+
 
 def load_board_html() -> str:
     """Return the HTML content for the board page."""
@@ -22,3 +31,76 @@ def load_settings_html() -> str:
 def load_main_html() -> str:
     """Return the HTML content for the landing page."""
     return MAIN_TEMPLATE_PATH.read_text(encoding="utf-8")
+
+
+class RenderedPage:
+    """A page rendered once and kept in memory as encoded bytes."""
+
+    __slots__ = ("name", "body", "etag", "mtime", "encoded")
+
+    def __init__(
+        self,
+        name: str,
+        body: bytes,
+        mtime: float,
+        encoded: Optional[Dict[str, bytes]] = None,
+    ) -> None:
+        self.name = name
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.mtime = mtime
+        self.encoded = encoded or {}
+
+
+class TemplateRegistry:
+    """Compile each page template once and serve the rendered bytes.
+
+    ``compile_source`` turns template source into an object with a ``render()``
+    method (normally ``app.jinja_env.from_string``).  With ``auto_reload``
+    enabled the source file's mtime is checked on each lookup and the page is
+    rebuilt only when it changed; otherwise pages are built once per process.
+    ``encoder`` may return pre-compressed variants of the rendered bytes keyed
+    by content coding.
+    """
+
+    def __init__(
+        self,
+        compile_source: Callable[[str], Any],
+        *,
+        paths: Optional[Dict[str, Path]] = None,
+        auto_reload: bool = True,
+        encoder: Optional[Callable[[bytes], Dict[str, bytes]]] = None,
+    ) -> None:
+        self._compile = compile_source
+        self._encoder = encoder
+        self._paths = dict(paths or PAGE_TEMPLATE_PATHS)
+        self._pages: Dict[str, RenderedPage] = {}
+        self._lock = threading.Lock()
+        self.auto_reload = auto_reload
+
+    def _build(self, name: str, path: Path, mtime: float) -> RenderedPage:
+        source = path.read_text(encoding="utf-8")
+        body = self._compile(source).render().encode("utf-8")
+        encoded = self._encoder(body) if self._encoder else None
+        return RenderedPage(name, body, mtime, encoded)
+
+    def get(self, name: str) -> RenderedPage:
+        """Return the rendered page, rebuilding it if the source changed."""
+        path = self._paths[name]
+        page = self._pages.get(name)
+        if page is not None and not self.auto_reload:
+            return page
+        mtime = path.stat().st_mtime
+        if page is not None and page.mtime == mtime:
+            return page
+        with self._lock:
+            page = self._pages.get(name)
+            if page is None or page.mtime != mtime:
+                page = self._build(name, path, mtime)
+                self._pages[name] = page
+        return page
+
+    def warm(self) -> None:
+        """Render every registered page ahead of the first request."""
+        for name in self._paths:
+            self.get(name)
@@ -0,0 +1,105 @@
+"""Response compression with Accept-Encoding negotiation.
+
+gzip is always available; brotli is used when the optional ``brotli``
+package is installed.
+"""
+from __future__ import annotations
+
+import gzip
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import brotli  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    brotli = None  # type: ignore[assignment]
+
+from ..config import CFG
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "application/javascript",
+}
+
+
+def _compression_cfg() -> Dict[str, Any]:
+    return CFG.get("compression", {}) or {}
+
+
+def available_encodings() -> Iterable[str]:
+    """Return supported content codings in order of preference."""
+    if brotli is not None:
+        return ("br", "gzip")
+    return ("gzip",)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    cfg = _compression_cfg()
+    if encoding == "br" and brotli is not None:
+        quality = int(cfg.get("brotli_quality", 5))
+        return brotli.compress(data, quality=quality)
+    if encoding == "gzip":
+        level = int(cfg.get("gzip_level", 6))
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def precompress(data: bytes) -> Dict[str, bytes]:
+    """Encode ``data`` with every available coding, best level allowed."""
+    encoded: Dict[str, bytes] = {}
+    for encoding in available_encodings():
+        if encoding == "br":
+            encoded[encoding] = brotli.compress(data, quality=11)  # type: ignore[union-attr]
+        else:
+            encoded[encoding] = gzip.compress(data, compresslevel=9, mtime=0)
+    return encoded
+
+
+def negotiate_encoding(accept_encodings: Any) -> Optional[str]:
+    """Pick the preferred coding from a Werkzeug ``Accept`` header object."""
+    best: Optional[str] = None
+    best_quality = 0.0
+    for encoding in available_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def install_compression(app) -> None:
+    """Compress cacheable API responses listed in ``compression.paths``."""
+    from flask import request
+
+    @app.after_request
+    def _compress_response(response):
+        cfg = _compression_cfg()
+        if not cfg.get("enabled", True):
+            return response
+        if request.method != "GET" or response.status_code != 200:
+            return response
+        if response.is_streamed or response.direct_passthrough:
+            return response
+        if "Content-Encoding" in response.headers:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        paths = cfg.get("paths") or []
+        if not any(request.path == p or request.path.startswith(p.rstrip("/") + "/") for p in paths):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        if len(body) < int(cfg.get("min_size", 1024)):
+            return response
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        return response
@@ -0,0 +1,115 @@
+"""gunicorn settings for the production server.
+
+Run with::
+
+    gunicorn -c python:scal_app.web.gunicorn_conf scal_main:app
+
+The app is preloaded in the master so templates and imports are shared
+copy-on-write between workers.  Each worker re-reads the config file after
+the fork and drops any upstream connections inherited from the master.
+Only one worker, the holder of ``<data dir>/.refresh.lock``, runs the
+refresh scheduler, so upstream traffic does not grow with the number of
+workers.  The others poll the lock and take over if that worker exits.
+Its refreshes reach every worker with ``cache.backend: sqlite``; with the
+memory backend the other workers fill their caches on demand.  Workers also
+follow the config file and re-read it in place when another process saves
+it, so a change made from the settings UI reaches every worker without a
+restart.  When ``server.reload_on_config_change`` is set, the master
+performs a graceful reload (SIGHUP) for edits made outside the app.
+"""
+from __future__ import annotations
+
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[2]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from scal_app import config as _config  # noqa: E402
+
+_server = _config.CFG.get("server", {}) or {}
+
+bind = os.environ.get("SCAL_BIND") or f"0.0.0.0:{int(_server.get('port', 5320))}"
+preload_app = True
+worker_class = "gthread"
+workers = max(1, int(os.environ.get("SCAL_WORKERS") or _server.get("workers", 2)))
+# Board SSE streams (/api/stream) keep one thread busy per connected client.
+threads = max(2, int(os.environ.get("SCAL_THREADS") or _server.get("threads", 8)))
+timeout = int(_server.get("timeout", 60))
+graceful_timeout = int(_server.get("graceful_timeout", 20))
+keepalive = 5
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+proc_name = "scal"
+
+_CONFIG_POLL = 2.0
+_REFRESH_LOCK = _config.BASE / ".refresh.lock"
+_REFRESH_RETRY = 30.0
+
+
+def _config_mtime() -> float:
+    try:
+        return _config.CONFIG_PATH.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _watch_config(server) -> None:
+    last = _config_mtime()
+    while True:
+        time.sleep(_CONFIG_POLL)
+        current = _config_mtime()
+        if current == last:
+            continue
+        last = current
+        if _config.saved_by_app():
+            # Saved from the settings UI; the workers pick it up themselves.
+            continue
+        server.log.info("Config %s changed; reloading workers", _config.CONFIG_PATH)
+        os.kill(server.pid, signal.SIGHUP)
+
+
+def _lead_refresh(server) -> None:
+    import fcntl
+
+    import scal_main
+
+    # Kept open for the life of the worker; the kernel drops the lock on exit.
+    fd = os.open(str(_REFRESH_LOCK), os.O_RDWR | os.O_CREAT, 0o644)
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            time.sleep(_REFRESH_RETRY)
+            continue
+        server.log.info("Worker %s runs the refresh scheduler", os.getpid())
+        scal_main.start_background_refresh()
+        return
+
+
+def when_ready(server) -> None:
+    import scal_main
+
+    scal_main.page_templates.warm()
+    if _server.get("reload_on_config_change", True):
+        threading.Thread(
+            target=_watch_config, args=(server,), name="config-watch", daemon=True
+        ).start()
+
+
+def post_fork(server, worker) -> None:
+    import scal_main
+
+    _config.reload_config()
+    scal_main.upstream.close()
+    threading.Thread(
+        target=_lead_refresh, args=(server,), name="refresh-leader", daemon=True
+    ).start()
+    _config.follow_config(scal_main.apply_config_change, interval=_CONFIG_POLL)
+    server.log.info("Worker %s ready", worker.pid)
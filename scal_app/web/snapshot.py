@@ -0,0 +1,58 @@
+"""Concurrent fan-out used to build the aggregated board snapshot."""
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Executor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Mapping, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+def gather_widgets(
+    producers: Mapping[str, Callable[[], Any]],
+    executor: Executor,
+    *,
+    deadline: float,
+    deadlines: Optional[Mapping[str, float]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Run every producer concurrently and collect one slot per widget.
+
+    Each slot is ``{"data": ..., "error": ..., "ms": ...}``.  A producer that
+    raises or misses its deadline gets ``data=None`` and an error message; the
+    others are unaffected, so the total wait is bounded by the slowest
+    deadline rather than the sum of the upstream round trips.
+    """
+    deadlines = deadlines or {}
+    started = time.monotonic()
+    futures = {name: executor.submit(_timed, producer) for name, producer in producers.items()}
+
+    def _limit(name: str) -> float:
+        try:
+            return float(deadlines.get(name, deadline))
+        except (TypeError, ValueError):
+            return deadline
+
+    slots: Dict[str, Dict[str, Any]] = {}
+    for name in sorted(futures, key=_limit):
+        remaining = started + _limit(name) - time.monotonic()
+        try:
+            data, elapsed = futures[name].result(timeout=max(0.0, remaining))
+        except FutureTimeout:
+            slots[name] = {"data": None, "error": "timeout", "ms": int(_limit(name) * 1000)}
+            continue
+        except Exception as exc:
+            LOGGER.warning("Snapshot widget %s failed", name, exc_info=True)
+            slots[name] = {
+                "data": None,
+                "error": str(exc) or exc.__class__.__name__,
+                "ms": int((time.monotonic() - started) * 1000),
+            }
+            continue
+        slots[name] = {"data": data, "error": None, "ms": int(elapsed * 1000)}
+    return slots
+
+
+def _timed(producer: Callable[[], Any]):
+    started = time.monotonic()
+    return producer(), time.monotonic() - started
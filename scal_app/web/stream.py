@@ -0,0 +1,219 @@
+"""Server-Sent Events hub that pushes board widget updates on change."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+Producer = Callable[[], Any]
+
+
+class _Widget:
+    __slots__ = (
+        "name", "producer", "interval", "next_at", "digest", "data", "seq", "started_at", "overdue",
+    )
+
+    def __init__(self, name: str, producer: Producer, interval: float) -> None:
+        self.name = name
+        self.producer = producer
+        self.interval = max(1.0, float(interval))
+        self.next_at = 0.0
+        self.digest = ""
+        self.data = ""
+        self.seq = 0
+        self.started_at: Optional[float] = None  # set while the producer runs
+        self.overdue = False
+
+
+class WidgetHub:
+    """Poll widget producers server-side and fan changes out to subscribers.
+
+    Each registered producer is called on its own interval.  A scheduler
+    thread hands due producers to a small pool, one slot per widget, so a
+    slow upstream only delays its own widget; a producer still running after
+    ``timeout`` seconds is logged and not called again until it returns.  The
+    JSON result is compared with the previous one and only a changed payload
+    bumps the widget's sequence number and wakes the connected streams, so
+    boards receive an event only when data changes.
+
+    Every open stream holds one server thread, so at most ``max_subscribers``
+    are accepted (see :meth:`try_subscribe`); ``0`` means no limit.
+    """
+
+    def __init__(
+        self,
+        *,
+        keepalive: float = 15.0,
+        timeout: float = 20.0,
+        max_subscribers: int = 0,
+    ) -> None:
+        self._widgets: Dict[str, _Widget] = {}
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._subscribers = 0
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.keepalive = keepalive
+        self.timeout = max(1.0, float(timeout))
+        self.max_subscribers = max(0, int(max_subscribers))
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the latest change seen by this hub."""
+        return self._seq
+
+    def register(self, name: str, producer: Producer, interval: float) -> None:
+        self._widgets[name] = _Widget(name, producer, interval)
+
+    def notify(self, *names: str) -> None:
+        """Refresh the named widgets on the next poll (e.g. after a mutation)."""
+        with self._cond:
+            for name in names:
+                widget = self._widgets.get(name)
+                if widget is not None:
+                    widget.next_at = 0.0
+            self._cond.notify_all()
+
+    def _refresh(self, widget: _Widget) -> bool:
+        try:
+            payload = widget.producer()
+        except Exception:
+            LOGGER.warning("Widget producer %s failed", widget.name, exc_info=True)
+            return False
+        finally:
+            with self._cond:
+                if widget.overdue:
+                    LOGGER.info(
+                        "Widget producer %s finished after %.1fs",
+                        widget.name, time.monotonic() - (widget.started_at or 0.0),
+                    )
+                widget.started_at = None
+                widget.overdue = False
+        data = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha1(data.encode("utf-8")).hexdigest()
+        if digest == widget.digest:
+            return False
+        with self._cond:
+            self._seq += 1
+            widget.seq = self._seq
+            widget.digest = digest
+            widget.data = data
+            self._cond.notify_all()
+        return True
+
+    def _poll_due(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, len(self._widgets)), thread_name_prefix="widget"
+            )
+        now = time.monotonic()
+        for widget in list(self._widgets.values()):
+            if widget.started_at is not None:
+                if not widget.overdue and now - widget.started_at > self.timeout:
+                    widget.overdue = True
+                    LOGGER.warning(
+                        "Widget producer %s still running after %.0fs", widget.name, self.timeout
+                    )
+                continue
+            if now < widget.next_at:
+                continue
+            widget.next_at = now + widget.interval
+            widget.started_at = now
+            try:
+                self._executor.submit(self._refresh, widget)
+            except RuntimeError:  # interpreter shutting down
+                return
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._subscribers == 0:
+                    self._cond.wait()
+            self._poll_due()
+            now = time.monotonic()
+            next_at = min(
+                (w.next_at for w in self._widgets.values() if w.started_at is None),
+                default=now + self.timeout,
+            )
+            with self._cond:
+                self._cond.wait(timeout=max(0.5, min(next_at - now, self.timeout)))
+
+    def _ensure_thread(self) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="widget-hub", daemon=True)
+            self._thread.start()
+
+    def _changed_since(self, seq: int) -> List[_Widget]:
+        return sorted(
+            (w for w in self._widgets.values() if w.seq > seq and w.data),
+            key=lambda w: w.seq,
+        )
+
+    def try_subscribe(self, last_seq: int = 0) -> Optional[Iterator[str]]:
+        """Open a stream of SSE frames, or return ``None`` when the hub is full.
+
+        The slot is taken here, under the lock, and released when the
+        returned iterator is closed (the WSGI server always closes it).
+        """
+        self._ensure_thread()
+        with self._cond:
+            if self.max_subscribers and self._subscribers >= self.max_subscribers:
+                return None
+            self._subscribers += 1
+            self._cond.notify_all()
+            # A Last-Event-ID from before a restart cannot be trusted.
+            seen = last_seq if 0 <= last_seq <= self._seq else 0
+        return _Subscription(self, self._frames(seen))
+
+    def _release(self) -> None:
+        with self._cond:
+            self._subscribers -= 1
+
+    def _frames(self, seen: int) -> Iterator[str]:
+        """Yield SSE frames: current state first, then every change."""
+        yield "retry: 5000\n\n"
+        while True:
+            with self._cond:
+                pending = self._changed_since(seen)
+                if not pending:
+                    self._cond.wait(timeout=self.keepalive)
+                    pending = self._changed_since(seen)
+            if not pending:
+                yield ": keepalive\n\n"
+                continue
+            for widget in pending:
+                seen = max(seen, widget.seq)
+                yield f"id: {widget.seq}\nevent: {widget.name}\ndata: {widget.data}\n\n"
+
+
+class _Subscription:
+    """One open stream; closing it gives the hub slot back exactly once."""
+
+    def __init__(self, hub: WidgetHub, frames: Iterator[str]) -> None:
+        self._hub = hub
+        self._frames = frames
+        self._open = True
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        return next(self._frames)
+
+    def close(self) -> None:
+        self._frames.close()
+        if self._open:
+            self._open = False
+            self._hub._release()
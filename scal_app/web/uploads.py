@@ -0,0 +1,99 @@
+"""Streaming multipart uploads: spooled to disk and hashed as they arrive."""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import IO, Any, Callable, List, Optional
+
+from flask import Flask, Request, g, has_request_context
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class HashingSpool:
+    """Write-through temp file that hashes and size-checks every chunk.
+
+    Werkzeug's form parser writes each uploaded file into the stream returned
+    by :meth:`Request._get_file_stream`; with this spool the data lands
+    directly in the staging directory, so accepting an upload never copies
+    it again, and its SHA-1 is known as soon as parsing finishes.
+    """
+
+    def __init__(self, directory: Path, limit: Optional[int]) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        self._file: IO[bytes] = os.fdopen(fd, "w+b")
+        self._hash = hashlib.sha1()
+        self.path = Path(name)
+        self.limit = limit
+        self.size = 0
+        self.claimed = False
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.limit and self.size > self.limit:
+            self.discard()
+            raise RequestEntityTooLarge(f"upload exceeds {self.limit} bytes")
+        self._hash.update(data)
+        return self._file.write(data)
+
+    @property
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def claim(self, dest: Path) -> Path:
+        """Move the spooled file to ``dest`` (same filesystem) and return it."""
+        self._file.close()
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.path, dest)
+        self.path = dest
+        self.claimed = True
+        return dest
+
+    def discard(self) -> None:
+        self._file.close()
+        if not self.claimed:
+            self.path.unlink(missing_ok=True)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+
+def install_uploads(
+    app: Flask,
+    *,
+    directory: Path,
+    limit: Callable[[], Optional[int]],
+    prefix: str = "/api/photos",
+) -> None:
+    """Spool file uploads for routes under ``prefix`` into ``directory``.
+
+    ``limit`` returns the per-file byte cap (``None``/0 for no cap); larger
+    files abort parsing with 413.  Spools the view did not claim are deleted
+    when the request ends.
+    """
+
+    class SpoolingRequest(Request):
+        def _get_file_stream(
+            self,
+            total_content_length: Optional[int],
+            content_type: Optional[str],
+            filename: Optional[str] = None,
+            content_length: Optional[int] = None,
+        ) -> IO[bytes]:
+            if not self.path.startswith(prefix) or not has_request_context():
+                return super()._get_file_stream(
+                    total_content_length, content_type, filename, content_length
+                )
+            spool = HashingSpool(directory, limit())
+            g.setdefault("upload_spools", []).append(spool)
+            return spool  # type: ignore[return-value]
+
+    app.request_class = SpoolingRequest
+
+    @app.teardown_request
+    def _discard_spools(_exc: Optional[BaseException]) -> None:
+        spools: List[HashingSpool] = g.pop("upload_spools", [])
+        for spool in spools:
+            spool.discard()
@@ -8,19 +8,22 @@ from __future__ import annotations
 # Search for lines like `# === [SECTION: ...] ===` to navigate.
 
 # === [SECTION: Imports / Standard & Third-party] ==============================
-import os, time, secrets, re, xml.etree.ElementTree as ET
+import argparse, os, sys, time, secrets, re, xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import quote
 
-import requests
+import hashlib
 import html
 import logging
-from flask import Flask, request, jsonify, render_template_string, abort, send_from_directory
-from PIL import Image, ImageOps
+import mimetypes
+import threading
+from flask import Flask, Response, request, jsonify, abort
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.middleware.proxy_fix import ProxyFix
-from werkzeug.utils import secure_filename
+from werkzeug.utils import secure_filename, send_file
 logging.basicConfig(
     format="%(asctime)s %(levelname)s %(name)s :: %(message)s",
     level=logging.INFO,
@@ -43,117 +46,31 @@ from scal_app.config import (
     save_todos,
 )
 from scal_app.services.weather import fetch_weather, fetch_air_quality
-from scal_app.services.bus import get_bus_arrivals, render_bus_box, pick_text
-from scal_app.templates import load_board_html, load_settings_html, load_main_html
-
-# === [SECTION: Photo processing helpers] =====================================
-
-def _pil_resample_lanczos():
-    """Return the best available LANCZOS resampling filter."""
-    resampling = getattr(Image, "Resampling", None)
-    if resampling is not None and hasattr(resampling, "LANCZOS"):
-        return resampling.LANCZOS
-    return getattr(Image, "LANCZOS")
-
-
-def _normalize_format(fmt: str) -> str:
-    fmt = (fmt or "").strip().upper()
-    if fmt == "JPG":
-        return "JPEG"
-    return fmt
-
-
-def _save_pil_image(img: Image.Image, dest: Path, img_format: str) -> None:
-    fmt = _normalize_format(img_format or dest.suffix.lstrip("."))
-    save_kwargs = {}
-    if fmt:
-        save_kwargs["format"] = fmt
-        if fmt == "JPEG" and img.mode not in ("RGB", "L"):
-            img = img.convert("RGB")
-    img.save(dest, **save_kwargs)
-
-
-FRAME_CANVAS_WIDTH = 1080
-FRAME_CANVAS_HEIGHT = 1920
-
-
-def _frame_canvas_mode_and_fill(img: Image.Image) -> tuple[str, Any]:
-    mode = img.mode or "RGB"
-    if mode == "RGBA":
-        return "RGBA", (0, 0, 0, 0)
-    if mode == "LA":
-        return "LA", (0, 0)
-    if mode == "L":
-        return "L", 0
-    if mode == "P":
-        if "transparency" in getattr(img, "info", {}):
-            return "RGBA", (0, 0, 0, 0)
-        return "RGB", (0, 0, 0)
-    return "RGB", (0, 0, 0)
-
-
-def _fit_image_for_frame(img: Image.Image) -> Image.Image:
-    width, height = img.size
-    if width <= 0 or height <= 0:
-        return img
-
-    scale = min(
-        1.0,
-        FRAME_CANVAS_WIDTH / float(width),
-        FRAME_CANVAS_HEIGHT / float(height),
-    )
-
-    new_width = max(1, int(round(width * scale)))
-    new_height = max(1, int(round(height * scale)))
-    if (new_width, new_height) != (width, height):
-        img = img.resize((new_width, new_height), _pil_resample_lanczos())
-        width, height = img.size
-
-    if width == FRAME_CANVAS_WIDTH and height == FRAME_CANVAS_HEIGHT:
-        return img
-
-    canvas_mode, fill = _frame_canvas_mode_and_fill(img)
-    canvas = Image.new(canvas_mode, (FRAME_CANVAS_WIDTH, FRAME_CANVAS_HEIGHT), fill)
-    paste_img = img if img.mode == canvas_mode else img.convert(canvas_mode)
-    offset_x = (FRAME_CANVAS_WIDTH - width) // 2
-    offset_y = (FRAME_CANVAS_HEIGHT - height) // 2
-    canvas.paste(paste_img, (offset_x, offset_y))
-    return canvas
-
-
-def process_uploaded_photo(dest: Path) -> None:
-    """Normalize uploaded photos for the frame canvas."""
-    if not dest.exists():
-        return
-
-    with Image.open(dest) as img:
-        original_format = img.format or dest.suffix.lstrip(".")
-        img = ImageOps.exif_transpose(img)
-
-        width, height = img.size
-        if width > height:
-            img = img.rotate(90, expand=True)
-
-        img = _fit_image_for_frame(img)
-        _save_pil_image(img, dest, original_format)
-
-
-def rotate_photo_file(dest: Path, angle: int) -> int:
-    """Rotate photo file by multiples of 90 degrees and keep frame sizing."""
-    if not dest.exists():
-        raise FileNotFoundError(dest)
-    normalized = angle % 360
-    with Image.open(dest) as img:
-        original_format = img.format or dest.suffix.lstrip(".")
-        img = ImageOps.exif_transpose(img)
-        if normalized:
-            img = img.rotate(normalized, expand=True)
-        img = _fit_image_for_frame(img)
-        _save_pil_image(img, dest, original_format)
-    return normalized
+from scal_app.services.bus import fetch_bus_arrivals, render_bus_box, pick_text
+from scal_app.services.cache import cache_stats, get_cache
+from scal_app.services.http import BoundClient, upstream
+from scal_app.services.photo_catalog import catalog, content_version
+from scal_app.services.photo_jobs import (
+    QueueFullError,
+    photo_jobs,
+    run_rotate_job,
+    run_upload_job,
+)
+from scal_app.services.playlist import window as playlist_window
+from scal_app.services.photos import (
+    PHOTO_EXTS,
+    derivatives,
+    frame_variant,
+)
+from scal_app.services.scheduler import build_scheduler
+from scal_app.templates import TemplateRegistry
+from scal_app.web.compression import install_compression, negotiate_encoding, precompress
+from scal_app.web.snapshot import gather_widgets
+from scal_app.web.stream import WidgetHub
+from scal_app.web.uploads import install_uploads
 
 # === [SECTION: iCal loader (with basic fallback parser)] =====================
-_ical_cache: Dict[str, Dict[str, Any]] = {}
+_ical_cache = get_cache("ical", ttl=300, max_entries=6, stale_ttl=3600)
 DEFAULT_CAL_COLOR = "#4b6bff"
 
 def _fmt_ics_date(v: str) -> str:
@@ -184,17 +101,17 @@ def _parse_ics_basic(text: str):
                 evs.append(cur)
     return evs
 
-def fetch_ical(url: str):
+def fetch_ical(url: str, *, refresh: bool = False):
     """Fetch ICS; use python-ics if available else fallback parser."""
-    now = time.time()
     if not url:
         return []
+    if refresh:
+        return _ical_cache.refresh(url, lambda: _load_ical(url))
+    return _ical_cache.get_or_load(url, lambda: _load_ical(url))
 
-    cached = _ical_cache.get(url)
-    if cached and now - cached.get("ts", 0.0) < 300:
-        return cached.get("events", [])
 
-    r = requests.get(url, timeout=10)
+def _load_ical(url: str) -> List[Dict[str, Any]]:
+    r = upstream.get(url)
     r.raise_for_status()
     text = r.text
     try:
@@ -211,13 +128,6 @@ def fetch_ical(url: str):
         evs = _parse_ics_basic(text)
 
     evs.sort(key=lambda x: (x.get("start", ""), x.get("title", "")))
-    _ical_cache[url] = {"ts": now, "events": evs}
-    # Keep cache small
-    if len(_ical_cache) > 6:
-        # Drop oldest entry
-        oldest_url = min(_ical_cache.items(), key=lambda item: item[1].get("ts", 0.0))[0]
-        if oldest_url != url:
-            _ical_cache.pop(oldest_url, None)
     return evs
 
 def month_filter(items, y, m):
@@ -287,7 +197,7 @@ def bus_search_stops(city_code: str, keyword: str, service_key: str, *, limit: i
         f"?serviceKey={quote(service_key)}&cityCode={quote(city_code)}&nodeNm={quote(keyword)}"
     )
     try:
-        response = requests.get(url, timeout=7)
+        response = upstream.get(url)
         response.raise_for_status()
     except Exception as exc:
         raise RuntimeError(f"정류소 검색 실패: {exc}")
@@ -393,7 +303,7 @@ def _home_assistant_timeout(cfg: Dict[str, Any]) -> float:
     return max(5.0, timeout)
 
 
-def _home_assistant_session() -> Tuple[requests.Session, float, Dict[str, Any], str]:
+def _home_assistant_session() -> Tuple[BoundClient, float, Dict[str, Any], str]:
     cfg = _home_assistant_cfg()
     base_url = (cfg.get("base_url") or "").strip().rstrip("/")
     if not base_url:
@@ -409,8 +319,7 @@ def _home_assistant_session() -> Tuple[requests.Session, float, Dict[str, Any],
 
     timeout = _home_assistant_timeout(cfg)
 
-    session = requests.Session()
-    session.headers.update(
+    session = upstream.bind(
         {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
@@ -421,7 +330,7 @@ def _home_assistant_session() -> Tuple[requests.Session, float, Dict[str, Any],
 
 
 def _home_assistant_request(
-    session: requests.Session,
+    session: BoundClient,
     method: str,
     path: str,
     *,
@@ -601,10 +510,27 @@ def home_assistant_list_devices() -> List[Dict[str, Any]]:
         formatted.sort(key=lambda d: ((d.get("room") or ""), d.get("name") or d.get("id") or ""))
         return formatted
     finally:
-        try:
-            session.close()
-        except Exception:  # pragma: no cover - defensive
-            pass
+        session.close()
+
+
+_home_assistant_cache = get_cache("home_assistant", ttl=30, max_entries=2, stale_ttl=60)
+
+
+def _home_assistant_cache_key(cfg: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        (cfg.get("base_url") or "").strip(),
+        (cfg.get("token") or "").strip(),
+        tuple(str(x) for x in cfg.get("include_domains") or []),
+        tuple(str(x) for x in cfg.get("include_entities") or []),
+    )
+
+
+def home_assistant_cached_devices(*, refresh: bool = False) -> List[Dict[str, Any]]:
+    """Return the device list through the Home Assistant state cache."""
+    key = _home_assistant_cache_key(_home_assistant_cfg())
+    if refresh:
+        return _home_assistant_cache.refresh(key, home_assistant_list_devices)
+    return _home_assistant_cache.get_or_load(key, home_assistant_list_devices)
 
 
 def home_assistant_execute(entity_id: str, turn_on: bool) -> Any:
@@ -625,19 +551,50 @@ def home_assistant_execute(entity_id: str, turn_on: bool) -> Any:
             json_payload=payload,
         )
     finally:
-        try:
-            session.close()
-        except Exception:  # pragma: no cover - defensive
-            pass
+        session.close()
+        _home_assistant_cache.invalidate()
 
 # === [SECTION: Photo file listing for board background] ======================
 def list_local_images():
-    exts = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
-    files = []
-    for p in sorted(PHOTOS_DIR.glob("**/*")):
-        if p.is_file() and p.suffix.lower() in exts:
-            files.append(str(p.relative_to(PHOTOS_DIR)))
-    return files
+    return catalog.listing(album=_active_album())[1]
+
+
+# Albums are the top-level folders of PHOTOS_DIR; the library root itself is
+# the "default" album and "*" selects every photo.
+DEFAULT_ALBUM = "default"
+ALL_ALBUMS = "*"
+
+
+def _album_key(value: Optional[str]) -> Optional[str]:
+    """Catalog album for a user-supplied name (``None`` = all albums)."""
+    name = (value or "").strip()
+    if name == ALL_ALBUMS:
+        return None
+    if name in ("", DEFAULT_ALBUM):
+        return ""
+    if (
+        "/" in name or "\\" in name or name.startswith(".") or len(name) > 100
+        or any(ch < " " for ch in name)
+    ):
+        raise ValueError(f"잘못된 앨범 이름입니다: {name}")
+    return name
+
+
+def _album_label(key: Optional[str]) -> str:
+    if key is None:
+        return ALL_ALBUMS
+    return key or DEFAULT_ALBUM
+
+
+def _active_album() -> Optional[str]:
+    try:
+        return _album_key(str((CFG.get("photos", {}) or {}).get("album") or ""))
+    except ValueError:
+        return ""
+
+
+def _album_dir(key: Optional[str]) -> Path:
+    return PHOTOS_DIR / key if key else PHOTOS_DIR
 
 
 def _settings_snapshot() -> Dict[str, Any]:
@@ -667,6 +624,7 @@ def _settings_snapshot() -> Dict[str, Any]:
             "api_key": weather_cfg.get("api_key", ""),
             "location": weather_cfg.get("location", ""),
         },
+        "photos": {"album": _album_label(_active_album())},
         "verse": {"text": get_verse()},
     }
 
@@ -685,6 +643,14 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 app.secret_key = os.environ.get("SFRAME_SESSION_SECRET", "CHANGE_ME_32CHARS")
 app.config.update(SESSION_COOKIE_SECURE=True, SESSION_COOKIE_SAMESITE="None")
 
+page_templates = TemplateRegistry(
+    app.jinja_env.from_string,
+    auto_reload=bool(CFG.get("server", {}).get("template_reload", True)),
+    encoder=precompress,
+)
+install_compression(app)
+install_uploads(app, directory=photo_jobs.staging_dir, limit=lambda: _max_upload_bytes())
+
 # === [SECTION: Verse helpers + API endpoints] ================================
 @app.get("/api/verse")
 def api_verse():
@@ -699,6 +665,7 @@ def api_set_verse():
         set_verse(text)
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
+    widget_hub.notify("verse")
     return jsonify({"success": True, "verse": {"text": get_verse()}})
 
 # === [SECTION: REST API endpoints used by the board HTML] ====================
@@ -767,6 +734,7 @@ def _load_todo_items() -> List[Dict[str, Any]]:
 def _persist_todo_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     items.sort(key=_todo_sort_key)
     save_todos(items)
+    widget_hub.notify("todo")
     return items
 
 
@@ -852,20 +820,22 @@ def api_get_settings():
     return jsonify(_settings_snapshot())
 
 
-@app.get("/api/frame-layout")
-def api_frame_layout():
-    orientation = request.args.get("orientation", "portrait")
+def _frame_layout_payload(orientation: str) -> Dict[str, Any]:
     key = normalize_orientation(orientation)
     layout = get_layout_for_orientation(key)
     defaults = FRAME_LAYOUT_DEFAULTS.get(key, {})
-    return jsonify(
-        {
-            "orientation": key,
-            "layout": layout,
-            "defaults": defaults,
-            "all": {name: vals for name, vals in FRAME_LAYOUT_DEFAULTS.items()},
-        }
-    )
+    return {
+        "orientation": key,
+        "layout": layout,
+        "photo_size": frame_variant(layout),
+        "defaults": defaults,
+        "all": {name: vals for name, vals in FRAME_LAYOUT_DEFAULTS.items()},
+    }
+
+
+@app.get("/api/frame-layout")
+def api_frame_layout():
+    return jsonify(_frame_layout_payload(request.args.get("orientation", "portrait")))
 
 
 @app.post("/api/settings")
@@ -956,6 +926,16 @@ def api_update_settings():
             CFG.setdefault("weather", {})["location"] = (section.get("location") or "").strip()
             updated = True
 
+        if "photos" in payload:
+            section = payload["photos"] or {}
+            if "album" in section:
+                key = _album_key(section.get("album"))
+                if key and not _album_dir(key).is_dir():
+                    errors.append(f"앨범을 찾을 수 없습니다: {key}")
+                else:
+                    CFG.setdefault("photos", {})["album"] = _album_label(key)
+                    updated = True
+
     except Exception as exc:
         return jsonify({"error": str(exc)}), 400
 
@@ -964,10 +944,22 @@ def api_update_settings():
 
     if updated:
         save_config_to_source(CFG)
+        apply_config_change()
 
     return jsonify({"success": True, "config": _settings_snapshot()})
 
 
+@app.get("/api/stats")
+def api_stats():
+    return jsonify({
+        "upstream": upstream.stats(),
+        "caches": cache_stats(),
+        "photo_derivatives": derivatives.stats(),
+        "photo_catalog": catalog.stats(),
+        "photo_jobs": photo_jobs.stats(),
+    })
+
+
 @app.get("/api/bus/search")
 def api_bus_search():
     keyword = (request.args.get("keyword") or "").strip()
@@ -989,16 +981,10 @@ def api_bus_search():
     ]
     return jsonify({"results": payload})
 
-@app.get("/api/events")
-def api_events():
+def _events_payload(y: Optional[int] = None, m: Optional[int] = None) -> List[Dict[str, Any]]:
     calendars = _calendar_entries()
     if not calendars:
-        return jsonify([])
-    try:
-        y = int(request.args.get("year")) if request.args.get("year") else None
-        m = int(request.args.get("month")) if request.args.get("month") else None
-    except Exception:
-        y = m = None
+        return []
     now_kst = datetime.now(TZ)
     y = y or now_kst.year
     m = m or now_kst.month
@@ -1019,55 +1005,407 @@ def api_events():
             item["calendar_index"] = idx
             aggregated.append(item)
     aggregated.sort(key=lambda x: (x.get("start", ""), x.get("title", "")))
-    return jsonify(aggregated)
+    return aggregated
 
-@app.get("/api/weather")
-def api_weather():
+
+@app.get("/api/events")
+def api_events():
+    try:
+        y = int(request.args.get("year")) if request.args.get("year") else None
+        m = int(request.args.get("month")) if request.args.get("month") else None
+    except Exception:
+        y = m = None
+    return jsonify(_events_payload(y, m))
+
+
+def _weather_payload() -> Tuple[Dict[str, Any], int]:
     try:
         data = fetch_weather()
-        return jsonify(data or {"need_config": True})
+        return data or {"need_config": True}, 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
 
-@app.get("/api/air")
-def api_air():
+
+def _air_payload() -> Tuple[Dict[str, Any], int]:
     try:
         data = fetch_air_quality()
-        return jsonify(data or {"need_config": True})
+        return data or {"need_config": True}, 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+
+@app.get("/api/weather")
+def api_weather():
+    payload, status = _weather_payload()
+    return jsonify(payload), status
+
+@app.get("/api/air")
+def api_air():
+    payload, status = _air_payload()
+    return jsonify(payload), status
+
+def _photos_etag_matches(etag: str) -> bool:
+    # The compression hook appends "-<encoding>" to the ETag it sends.
+    return any(
+        tag == etag or tag.startswith(f"{etag}-") for tag in request.if_none_match.as_set()
+    )
+
 
 @app.get("/api/photos")
 def api_photos():
-    return jsonify(list_local_images())
+    """Photo names; ``?since=<version>`` returns only what changed after it.
+
+    ``?detail=1`` returns ``{name, width, height, orientation, bytes}``
+    entries instead of bare names.  ``?album=`` (``default`` is the library
+    root, ``*`` every album) limits the result to one album; together with
+    ``?limit=`` / ``?after=`` the response is one page,
+    ``{"album", "version", "photos", "next"}``, where ``next`` is the
+    ``after`` value of the following page (``null`` on the last one).
+    """
+    since = request.args.get("since", type=int)
+    detail = request.args.get("detail") in ("1", "true")
+    try:
+        album = _album_key(request.args.get("album", ALL_ALBUMS))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    paged = since is None and any(key in request.args for key in ("album", "limit", "after"))
+    limit = min(max(1, request.args.get("limit", type=int) or 200), 1000)
+    after = request.args.get("after") or ""
+    suffix = "d" if detail else "n"
+    if paged or album is not None:
+        scope = f"{_album_label(album)}\0{after}\0{limit if paged else ''}"
+        suffix += "-" + hashlib.sha1(scope.encode("utf-8")).hexdigest()[:8]
+    version = catalog.version
+    etag = f"{catalog.epoch}-{version}-{suffix}"
+    if _photos_etag_matches(etag):
+        resp = Response(status=304)
+    elif paged:
+        version, entries, following = catalog.page(
+            album=album, after=after, limit=limit, detail=detail
+        )
+        etag = f"{catalog.epoch}-{version}-{suffix}"
+        resp = jsonify({
+            "album": _album_label(album),
+            "version": version,
+            "photos": entries,
+            "next": following,
+        })
+    else:
+        payload: Any = None
+        if since is not None:
+            payload = catalog.changes_since(since, detail=detail, album=album)
+        if payload is None:
+            version, names = catalog.listing(detail=detail, album=album)
+            etag = f"{catalog.epoch}-{version}-{suffix}"
+            payload = names if since is None else {"version": version, "full": True, "photos": names}
+        resp = jsonify(payload)
+    resp.set_etag(etag)
+    resp.headers["X-Photos-Version"] = str(version)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@app.get("/api/photos/albums")
+def api_photo_albums():
+    """Albums with photo counts and the one the board is showing."""
+    albums = [
+        {**entry, "name": _album_label(entry["name"])} for entry in catalog.albums()
+    ]
+    return jsonify({"active": _album_label(_active_album()), "albums": albums})
 
 
-@app.post("/api/photos/upload")
-def api_photos_upload():
-    if "photo" not in request.files:
-        return jsonify({"error": "사진 파일을 선택해주세요."}), 400
-    file = request.files["photo"]
+@app.post("/api/photos/albums")
+def api_create_photo_album():
+    payload = request.get_json(silent=True) or {}
+    try:
+        key = _album_key(str(payload.get("name") or ""))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if not key:
+        return jsonify({"error": "앨범 이름을 입력해주세요."}), 400
+    try:
+        _album_dir(key).mkdir(parents=True, exist_ok=True)
+    except OSError as exc:
+        return jsonify({"error": f"앨범 생성 실패: {exc}"}), 500
+    catalog.reconcile()
+    widget_hub.notify("photos")
+    return jsonify({"success": True, "album": key}), 201
+
+
+@app.get("/api/photos/playlist")
+def api_photos_playlist():
+    """Next window of the shared slideshow sequence.
+
+    ``?seed=`` picks the order (default ``photos.playlist.seed``, else one
+    per catalog, so all frames walk the same sequence and share derivative
+    cache entries); ``?cursor=`` is the ``next`` value of the previous
+    window; ``?size=`` / ``?orientation=`` select the rendition and
+    ``?album=`` the photos (default ``photos.album``).  The first
+    items are also announced as ``Link: rel=preload`` and their derivatives
+    are warmed in the background.
+    """
+    cfg = (CFG.get("photos", {}) or {}).get("playlist", {}) or {}
+    seed = request.args.get("seed") or str(cfg.get("seed") or "") or catalog.epoch
+    count = min(max(1, request.args.get("count", type=int) or int(cfg.get("window", 10))), 50)
+    size = (request.args.get("size") or "").strip().lower()
+    if not size:
+        orientation = request.args.get("orientation")
+        size = frame_variant(get_layout_for_orientation(orientation)) if orientation else "frame"
+    if not _is_photo_size(size):
+        return jsonify({"error": "지원하지 않는 크기입니다."}), 400
+    try:
+        album = _album_key(request.args["album"]) if "album" in request.args else _active_album()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    # Order by name only; details are read for just the window's photos.
+    version, names = catalog.listing(album=album)
+    picked, cursor = playlist_window(
+        names, seed=seed, cursor=request.args.get("cursor") or "", count=count
+    )
+    details = catalog.details(picked)
+    items = [dict(details[name]) for name in picked if name in details]
+    for item in items:
+        query = f"size={quote(size)}" + (f"&v={item['v']}" if item.get("v") else "")
+        item["url"] = f"/photos/{quote(item['name'])}?{query}"
+    resp = jsonify({
+        "seed": seed,
+        "album": _album_label(album),
+        "version": version,
+        "size": size,
+        "next": cursor,
+        "items": items,
+    })
+    preload = items[: int(cfg.get("preload", 3))]
+    if preload:
+        resp.headers["Link"] = ", ".join(f"<{item['url']}>; rel=preload; as=image" for item in preload)
+    resp.headers["Cache-Control"] = "no-cache"
+    if size != "original":
+        for item in items:
+            _queue_warm(item["name"], size)
+    return resp
+
+
+playlist_warmer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playlist-warm")
+# (digest, size) pairs queued on playlist_warmer; every frame asks for the
+# same window, so most requests find their photos already queued or cached.
+_warm_pending: set = set()
+_warm_lock = threading.Lock()
+_WARM_QUEUE_LIMIT = 64
+
+
+def _queue_warm(name: str, size: str) -> None:
+    source = PHOTOS_DIR / name
+    digest = _catalog_digest(name, source)
+    if digest is None or derivatives.path_for(digest, size).exists():
+        return
+    key = (digest, size)
+    with _warm_lock:
+        if key in _warm_pending or len(_warm_pending) >= _WARM_QUEUE_LIMIT:
+            return
+        _warm_pending.add(key)
+    playlist_warmer.submit(_warm_derivative, source, size, digest)
+
+
+def _warm_derivative(source: Path, size: str, digest: str) -> None:
+    try:
+        derivatives.get(source, size, digest=digest)
+    except Exception:
+        logging.getLogger(__name__).warning("Warming %s for %s failed", size, source, exc_info=True)
+    finally:
+        with _warm_lock:
+            _warm_pending.discard((digest, size))
+
+
+def _catalog_digest(name: str, source: Path) -> Optional[str]:
+    """Catalog hash of ``source``, trusted only while the file is the one it describes."""
+    entry = catalog.get(name)
+    if entry is None:
+        return None
+    try:
+        st = source.stat()
+    except OSError:
+        return None
+    if (entry["size"], entry["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+        return None
+    return entry["hash"]
+
+
+def _is_photo_size(size: str) -> bool:
+    return size == "original" or size in derivatives.sizes or size in _layout_variants()
+
+
+def _layout_variants() -> List[str]:
+    """Derivative sizes rendered exactly for each configured frame layout."""
+    return sorted({frame_variant(layout) for layout in frame_layout_snapshot().values()})
+
+
+def _pregenerate_sizes() -> List[str]:
+    cfg = CFG.get("photos", {}) or {}
+    sizes = list(cfg.get("pregenerate") or ())
+    if cfg.get("pregenerate_layouts", True):
+        sizes.extend(_layout_variants())
+    return sizes
+
+
+def _publish_photo(
+    staged: Path,
+    dest: Path,
+    *,
+    replace_only: bool = False,
+    source_hash: Optional[str] = None,
+    placeholder: Optional[str] = None,
+) -> None:
+    """Move a processed file into the library (runs when its job finishes)."""
+    if replace_only and not dest.exists():
+        raise FileNotFoundError(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staged, dest)
+    catalog.upsert(dest, source_hash=source_hash, placeholder=placeholder)
+    widget_hub.notify("photos")
+
+
+def _max_upload_bytes() -> int:
+    return int((CFG.get("photos", {}) or {}).get("max_upload_bytes") or 0)
+
+
+@app.get("/api/photos/jobs")
+def api_photo_jobs():
+    ids = [i for i in (request.args.get("ids") or "").split(",") if i][:500]
+    return jsonify({"jobs": {job_id: photo_jobs.status(job_id) for job_id in ids}})
+
+
+@app.get("/api/photos/jobs/<job_id>")
+def api_photo_job(job_id: str):
+    job = photo_jobs.status(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    return jsonify(job)
+
+
+def _queue_upload(file: Any, album: str = "") -> Tuple[Dict[str, Any], int]:
+    """Deduplicate one spooled upload and queue it for processing into ``album``."""
     if not file or not file.filename:
-        return jsonify({"error": "파일 이름을 확인해주세요."}), 400
+        return {"error": "파일 이름을 확인해주세요."}, 400
     filename = secure_filename(file.filename)
     ext = Path(filename).suffix.lower()
-    allowed_exts = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
-    if ext not in allowed_exts:
-        return jsonify({"error": "지원하지 않는 파일 형식입니다."}), 400
+    if ext not in PHOTO_EXTS:
+        return {"error": "지원하지 않는 파일 형식입니다."}, 400
+    spool = file.stream
+    digest = spool.hexdigest
+    # Duplicates are per album: the same photo may be filed in several albums.
+    existing = catalog.find_by_hash(digest, album=album)
+    if existing is not None:
+        return {"success": True, "duplicate": True, "filename": existing}, 200
+    pending = photo_jobs.find_active(source_hash=digest, album=album)
+    if pending is not None:
+        return {
+            "success": True,
+            "duplicate": True,
+            "filename": pending["filename"],
+            "job_id": pending["id"],
+            "status": pending["status"],
+        }, 200
     ts = datetime.now(TZ).strftime("%Y%m%d_%H%M%S")
     new_name = f"web_{ts}_{secrets.token_hex(3)}{ext}"
-    dest = PHOTOS_DIR / new_name
+    dest = _album_dir(album) / new_name
+    new_name = dest.relative_to(PHOTOS_DIR).as_posix()
+    job_id = photo_jobs.new_id()
+    staged = spool.claim(photo_jobs.staging_path(job_id, new_name))
     try:
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        file.save(dest)
-        process_uploaded_photo(dest)
+        job = photo_jobs.submit(
+            job_id, "upload", new_name, run_upload_job, (str(staged), _pregenerate_sizes()),
+            publish=lambda result: _publish_photo(
+                staged, dest, source_hash=digest, placeholder=result.get("placeholder")
+            ),
+            cleanup=staged,
+            meta={"source_hash": digest, "album": album},
+        )
+    except QueueFullError:
+        staged.unlink(missing_ok=True)
+        return {"error": "사진 처리 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요."}, 503
     except Exception as exc:
-        try:
-            dest.unlink()
-        except Exception:
-            pass
-        return jsonify({"error": f"업로드 실패: {exc}"}), 500
-    return jsonify({"success": True, "filename": new_name})
+        staged.unlink(missing_ok=True)
+        return {"error": f"업로드 실패: {exc}"}, 500
+    return {"success": True, "job_id": job["id"], "status": job["status"], "filename": new_name}, 202
+
+
+def _upload_response(payload: Dict[str, Any], status: int):
+    resp = jsonify(payload)
+    resp.status_code = status
+    if status == 202:
+        resp.headers["Location"] = f"/api/photos/jobs/{payload['job_id']}"
+    elif status == 503:
+        resp.headers["Retry-After"] = "5"
+    return resp
+
+
+def _upload_album() -> str:
+    return _album_key(request.form.get("album")) or ""
+
+
+def _upload_too_large():
+    limit = _max_upload_bytes()
+    return jsonify({"error": f"파일이 너무 큽니다. (최대 {limit // (1024 * 1024)}MB)"}), 413
+
+
+@app.post("/api/photos/upload")
+def api_photos_upload():
+    try:
+        files = request.files
+    except RequestEntityTooLarge:
+        return _upload_too_large()
+    if "photo" not in files:
+        return jsonify({"error": "사진 파일을 선택해주세요."}), 400
+    try:
+        album = _upload_album()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return _upload_response(*_queue_upload(files["photo"], album))
+
+
+@app.post("/api/photos/upload/batch")
+def api_photos_upload_batch():
+    """Queue many files (form field ``photos``) at once.
+
+    Every file is spooled and deduplicated like a single upload; the jobs run
+    in parallel on the photo process pool.  ``results`` holds one entry per
+    file, in upload order, with the per-file ``http_status``.  Both upload
+    endpoints take an optional ``album`` form field (default: library root).
+    The whole request is capped by ``photos.max_batch_bytes`` and
+    ``photos.max_batch_files``.
+    """
+    cfg = CFG.get("photos", {}) or {}
+    max_bytes = int(cfg.get("max_batch_bytes") or 0)
+    max_files = int(cfg.get("max_batch_files") or 0)
+    if max_bytes and (request.content_length or 0) > max_bytes:
+        limit_mb = max_bytes // (1024 * 1024)
+        return jsonify({"error": f"한 번에 올릴 수 있는 용량을 넘었습니다. (최대 {limit_mb}MB)"}), 413
+    try:
+        files = request.files.getlist("photos")
+    except RequestEntityTooLarge:
+        return _upload_too_large()
+    if not files:
+        return jsonify({"error": "사진 파일을 선택해주세요."}), 400
+    if max_files and len(files) > max_files:
+        return jsonify({"error": f"한 번에 최대 {max_files}개까지 올릴 수 있습니다."}), 413
+    try:
+        album = _upload_album()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    results = []
+    for file in files:
+        payload, status = _queue_upload(file, album)
+        results.append({"name": file.filename or "", "http_status": status, **payload})
+    counts = {
+        "queued": sum(1 for r in results if r["http_status"] == 202),
+        "duplicates": sum(1 for r in results if r.get("duplicate")),
+        "failed": sum(1 for r in results if r["http_status"] >= 400),
+    }
+    resp = jsonify({"success": counts["failed"] < len(results), "results": results, **counts})
+    resp.status_code = 202 if counts["queued"] else 200
+    if any(r["http_status"] == 503 for r in results):
+        resp.headers["Retry-After"] = "5"
+    return resp
 
 
 @app.post("/api/photos/<path:fname>/rotate")
@@ -1107,14 +1445,31 @@ def api_rotate_photo(fname: str):
     if angle % 90 != 0:
         return jsonify({"error": "회전은 90도 단위로만 가능합니다."}), 400
 
+    name = Path(fname).as_posix()
+    if photo_jobs.find_active(filename=name) is not None:
+        return jsonify({"error": "이미 처리 중인 사진입니다. 잠시 후 다시 시도해주세요."}), 409
+    job_id = photo_jobs.new_id()
+    staged = photo_jobs.staging_path(job_id, name)
     try:
-        normalized = rotate_photo_file(target, angle)
-    except FileNotFoundError:
-        return jsonify({"error": "파일을 찾을 수 없습니다."}), 404
+        job = photo_jobs.submit(
+            job_id, "rotate", name, run_rotate_job,
+            (str(target), str(staged), angle, _pregenerate_sizes()),
+            publish=lambda _result: _publish_photo(staged, target, replace_only=True),
+            cleanup=staged,
+        )
+    except QueueFullError:
+        return _upload_response(
+            {"error": "사진 처리 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요."}, 503
+        )
     except Exception as exc:
         return jsonify({"error": f"회전에 실패했습니다: {exc}"}), 500
-
-    return jsonify({"success": True, "angle": angle, "normalized_angle": normalized})
+    return _upload_response({
+        "success": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "angle": angle,
+        "normalized_angle": angle % 360,
+    }, 202)
 
 
 @app.delete("/api/photos/<path:fname>")
@@ -1128,39 +1483,128 @@ def api_delete_photo(fname: str):
         target.unlink()
     except Exception as exc:
         return jsonify({"error": f"삭제 실패: {exc}"}), 500
+    catalog.remove(target)
+    widget_hub.notify("photos")
     return jsonify({"success": True})
 
 
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _sendfile_location(path: Path, cfg: Dict[str, Any]) -> Optional[str]:
+    """Internal proxy URI for ``path`` (X-Accel-Redirect), or ``None``."""
+    resolved = path.resolve()
+    for root, key in ((PHOTOS_DIR, "photos_uri"), (derivatives.root, "cache_uri")):
+        prefix = cfg.get(key)
+        try:
+            relative = resolved.relative_to(Path(root).resolve())
+        except ValueError:
+            continue
+        if prefix:
+            return prefix.rstrip("/") + "/" + quote(relative.as_posix())
+    return None
+
+
+def _send_photo(path: Path, *, immutable: bool):
+    """Send a photo file, handing the transfer to the front proxy if configured.
+
+    ``photos.sendfile.mode``: ``x-accel-redirect`` (nginx; ``photos_uri`` and
+    ``cache_uri`` name the internal locations of the library and derivative
+    cache), ``x-sendfile`` (Apache/lighttpd) or empty for gunicorn's own
+    sendfile.  Range requests are left to whichever side sends the bytes.
+    """
+    cfg = (CFG.get("photos", {}) or {}).get("sendfile", {}) or {}
+    mode = str(cfg.get("mode") or "").lower()
+    location = _sendfile_location(path, cfg) if mode == "x-accel-redirect" else None
+    if location is not None:
+        resp = Response(mimetype=mimetypes.guess_type(path.name)[0] or "application/octet-stream")
+        resp.headers["X-Accel-Redirect"] = location
+    else:
+        environ = request.environ
+        if mode == "x-sendfile":
+            environ = {k: v for k, v in environ.items() if k not in ("HTTP_RANGE", "HTTP_IF_RANGE")}
+        resp = send_file(
+            path,
+            environ,
+            use_x_sendfile=mode == "x-sendfile",
+            response_class=app.response_class,
+            conditional=True,
+        )
+    resp.headers["Cache-Control"] = _IMMUTABLE if immutable else "no-cache"
+    return resp
+
+
 @app.get("/photos/<path:fname>")
 def serve_photo(fname):
-    return send_from_directory(str(PHOTOS_DIR), fname)
+    """Serve a photo or one of its ``?size=`` derivatives (Range supported).
+
+    ``size`` is a named box or a frame layout variant (``photo_size`` from
+    ``/api/frame-layout``), rendered at exactly the layout's resolution.
+
+    URLs carrying the current content version (``?v=`` from
+    ``/api/photos?detail=1``) are cacheable forever; any other URL must be
+    revalidated, which the ETag makes cheap.
+    """
+    size = (request.args.get("size") or "").strip().lower()
+    if size == "original":
+        size = ""
+    if size and not _is_photo_size(size):
+        return jsonify({"error": "지원하지 않는 크기입니다."}), 400
+    source = PHOTOS_DIR / fname
+    if not _is_safe_photo_path(source) or not source.is_file():
+        abort(404)
+    digest = _catalog_digest(Path(fname).as_posix(), source)
+    path = source
+    fallback = False
+    if size:
+        try:
+            path = derivatives.get(source, size, digest=digest)
+        except Exception:
+            logging.getLogger(__name__).warning(
+                "Derivative %s failed for %s; serving original", size, fname, exc_info=True
+            )
+            # The original must not stick to the ?size= URL in client caches.
+            fallback = True
+    requested = request.args.get("v")
+    immutable = not fallback and bool(requested) and requested == content_version(digest)
+    return _send_photo(path, immutable=immutable)
 
-@app.get("/api/bus")
-def api_bus():
+
+def _bus_payload() -> Tuple[Dict[str, Any], int]:
     try:
-        data = render_bus_box()
-        return jsonify(data)
+        return render_bus_box(), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
 
 
-@app.get("/api/home-devices")
-def api_home_devices():
+@app.get("/api/bus")
+def api_bus():
+    payload, status = _bus_payload()
+    return jsonify(payload), status
+
+
+def _home_devices_payload() -> Tuple[Dict[str, Any], int]:
     try:
-        devices = home_assistant_list_devices()
+        devices = home_assistant_cached_devices()
         resp: Dict[str, Any] = {
             "devices": devices,
             "dashboard": {"title": "Home Assistant", "entity_count": len(devices)},
         }
         if not devices:
             resp["message"] = "Home Assistant에서 표시할 엔티티를 찾지 못했습니다."
-        return jsonify(resp)
+        return resp, 200
     except HomeAssistantConfigError as e:
-        return jsonify({"need_config": True, "message": str(e)})
+        return {"need_config": True, "message": str(e)}, 200
     except HomeAssistantAPIError as e:
-        return jsonify({"error": str(e)}), 502
+        return {"error": str(e)}, 502
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+
+@app.get("/api/home-devices")
+def api_home_devices():
+    payload, status = _home_devices_payload()
+    return jsonify(payload), status
 
 
 @app.post("/api/home-devices/<device_id>/execute")
@@ -1175,6 +1619,7 @@ def api_home_devices_execute(device_id: str):
 
     try:
         home_assistant_execute(device_id, desired)
+        widget_hub.notify("home-devices")
         return jsonify({"success": True})
     except HomeAssistantConfigError as e:
         return jsonify({"error": str(e)}), 400
@@ -1184,41 +1629,238 @@ def api_home_devices_execute(device_id: str):
         return jsonify({"error": str(e)}), 500
 
 
+# === [SECTION: Board widget stream (SSE)] ===================================
+BOARD_WIDGETS = {
+    "verse": lambda: {"text": get_verse()},
+    "todo": lambda: {"items": _serialize_todos(_load_todo_items())},
+    "events": lambda: _events_payload(),
+    "weather": lambda: _weather_payload()[0],
+    "air": lambda: _air_payload()[0],
+    "home-devices": lambda: _home_devices_payload()[0],
+    "bus": lambda: _bus_payload()[0],
+    # The board fetches the (delta) listing itself; the stream only signals changes.
+    "photos": lambda: {
+        "version": catalog.version,
+        "epoch": catalog.epoch,
+        "album": _album_label(_active_album()),
+    },
+}
+
+
+def _build_widget_hub() -> WidgetHub:
+    stream_cfg = CFG.get("stream", {}) or {}
+    intervals = stream_cfg.get("intervals", {}) or {}
+    # Each open stream pins one gthread thread; keep half of them for requests.
+    threads = int((CFG.get("server", {}) or {}).get("threads", 8))
+    hub = WidgetHub(
+        keepalive=float(stream_cfg.get("keepalive", 15)),
+        timeout=float(stream_cfg.get("timeout", 20)),
+        max_subscribers=int(stream_cfg.get("max_clients") or max(1, threads // 2)),
+    )
+    for name, producer in BOARD_WIDGETS.items():
+        hub.register(name, producer, float(intervals.get(name, 60)))
+    return hub
+
+
+widget_hub = _build_widget_hub()
+
+
+@app.get("/api/stream")
+def api_stream():
+    try:
+        last_seq = int(request.headers.get("Last-Event-ID") or request.args.get("since") or 0)
+    except ValueError:
+        last_seq = 0
+    frames = widget_hub.try_subscribe(last_seq)
+    if frames is None:
+        resp = jsonify({"error": "too many live connections"})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = "60"
+        return resp
+    resp = Response(frames, mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
+# === [SECTION: Aggregated board snapshot] ===================================
+_snapshot_cfg = CFG.get("snapshot", {}) or {}
+snapshot_executor = ThreadPoolExecutor(
+    max_workers=int(_snapshot_cfg.get("max_workers", 12)),
+    thread_name_prefix="snapshot",
+)
+# Widgets whose builders return (payload, status).  The stream pushes their
+# error payloads as-is; a snapshot slot reports the failure in "error".
+_SNAPSHOT_CHECKED = {
+    "weather": _weather_payload,
+    "air": _air_payload,
+    "home-devices": _home_devices_payload,
+    "bus": _bus_payload,
+}
+
+
+def _checked_producer(build: Callable[[], Tuple[Dict[str, Any], int]]) -> Callable[[], Dict[str, Any]]:
+    def produce() -> Dict[str, Any]:
+        payload, status = build()
+        if status >= 400:
+            raise RuntimeError(payload.get("error") or f"HTTP {status}")
+        return payload
+
+    return produce
+
+
+@app.get("/api/board-snapshot")
+def api_board_snapshot():
+    snapshot_cfg = CFG.get("snapshot", {}) or {}
+    orientation = request.args.get("orientation", "portrait")
+    producers: Dict[str, Any] = {"frame-layout": lambda: _frame_layout_payload(orientation)}
+    producers.update(BOARD_WIDGETS)
+    producers.update({name: _checked_producer(build) for name, build in _SNAPSHOT_CHECKED.items()})
+    # Taken before fan-out so the stream resumes from data no newer than ours.
+    stream_seq = widget_hub.sequence
+    started = time.monotonic()
+    widgets = gather_widgets(
+        producers,
+        snapshot_executor,
+        deadline=float(snapshot_cfg.get("deadline", 5)),
+        deadlines=snapshot_cfg.get("deadlines") or {},
+    )
+    return jsonify(
+        {
+            "widgets": widgets,
+            "stream_seq": stream_seq,
+            "elapsed_ms": int((time.monotonic() - started) * 1000),
+        }
+    )
+
+
+# === [SECTION: Refresh-ahead scheduler] =====================================
+def _refresh_calendars() -> None:
+    errors = []
+    for cal in _calendar_entries():
+        try:
+            fetch_ical(cal["url"], refresh=True)
+        except Exception as exc:
+            errors.append(f"{cal['url']}: {exc}")
+    if errors:
+        raise RuntimeError("; ".join(errors))
+
+
+def _refresh_home_assistant() -> None:
+    cfg = _home_assistant_cfg()
+    if (cfg.get("base_url") or "").strip() and (cfg.get("token") or "").strip():
+        home_assistant_cached_devices(refresh=True)
+
+
+def _reconcile_photos() -> None:
+    if catalog.reconcile():
+        widget_hub.notify("photos")
+
+
+REFRESH_SOURCES = {
+    "weather": lambda: fetch_weather(refresh=True),
+    "air": lambda: fetch_air_quality(refresh=True),
+    "bus": lambda: fetch_bus_arrivals(refresh=True),
+    "calendars": _refresh_calendars,
+    "home_assistant": _refresh_home_assistant,
+    "photos": _reconcile_photos,
+}
+
+refresh_scheduler = build_scheduler(REFRESH_SOURCES)
+
+
+def start_background_refresh() -> None:
+    if (CFG.get("refresh", {}) or {}).get("enabled", True):
+        refresh_scheduler.start()
+
+
+def apply_config_change() -> None:
+    """Refresh upstream data and push every widget after ``CFG`` changed."""
+    for name in REFRESH_SOURCES:
+        refresh_scheduler.run_now(name)
+    widget_hub.notify(*BOARD_WIDGETS.keys())
+
+
+@app.get("/api/refresh/status")
+def api_refresh_status():
+    return jsonify(refresh_scheduler.status())
+
+
 # === [SECTION: Board HTML (legacy UI; monthly calendar + photo fade)] ========
 # Board HTML moved to scal_app.templates.board.html
 
 
 
+def _serve_page(name: str):
+    page = page_templates.get(name)
+    encoding = negotiate_encoding(request.accept_encodings)
+    body = page.encoded.get(encoding) if encoding else None
+    if body is None:
+        resp = app.response_class(page.body, mimetype="text/html")
+        resp.set_etag(page.etag)
+    else:
+        resp = app.response_class(body, mimetype="text/html")
+        resp.headers["Content-Encoding"] = encoding
+        resp.set_etag(f"{page.etag}-{encoding}")
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+
 @app.get("/main")
 def main_page():
-    return render_template_string(load_main_html())
+    return _serve_page("main")
 
 
 @app.get("/board")
 def board():
-    return render_template_string(load_board_html())
+    return _serve_page("board")
 
 
 @app.get("/settings")
 def settings_page():
-    return render_template_string(load_settings_html())
+    return _serve_page("settings")
 
 # === [SECTION: App entrypoint (web only)] ===================================
 def run_web():
+    """Werkzeug development server (``--debug`` only)."""
     try:
         app.run(
             host="0.0.0.0",
             port=int(CFG["server"]["port"]),
             debug=False,
             use_reloader=False,
+            threaded=True,
         )
     except OSError:
         print("Address already in use")
         raise
 
 
+def run_gunicorn():
+    """Replace this process with the production gunicorn server."""
+    args = [
+        sys.executable, "-m", "gunicorn",
+        "-c", "python:scal_app.web.gunicorn_conf",
+        "--chdir", str(Path(__file__).resolve().parent),
+        "scal_main:app",
+    ]
+    os.execv(sys.executable, args)
+
+
 def main():
-    print(f"[WEB] starting on :{CFG['server']['port']}  -> /board")
+    parser = argparse.ArgumentParser(description="Scal smart frame server")
+    parser.add_argument(
+        "--debug", action="store_true", help="run the single-process development server"
+    )
+    opts = parser.parse_args()
+    if not opts.debug:
+        print(f"[WEB] starting gunicorn on :{CFG['server']['port']}  -> /board")
+        run_gunicorn()
+        return
+    print(f"[WEB] starting debug server on :{CFG['server']['port']}  -> /board")
+    page_templates.warm()
+    start_background_refresh()
     run_web()
 
 
@@ -111,7 +111,8 @@ WorkingDirectory=$APP_DIR
 Environment=SCAL_DATA_DIR=$DATA_DIR
 Environment=SCAL_CONFIG_FILE=$CONFIG_DIR/config.yaml
 Environment=PYTHONUNBUFFERED=1
-ExecStart=$APP_DIR/.venv/bin/python $APP_DIR/scal_main.py
+ExecStart=$APP_DIR/.venv/bin/python -m gunicorn -c python:scal_app.web.gunicorn_conf scal_main:app
+ExecReload=/bin/kill -HUP \$MAINPID
 Restart=on-failure
 RestartSec=5
 
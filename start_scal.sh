@@ -4,4 +4,4 @@ cd /root/scal
 if [ -d "venv" ]; then
   . venv/bin/activate
 fi
-exec /root/scal/venv/bin/python -u /root/scal/scal_main.py
+exec /root/scal/venv/bin/python -u -m gunicorn -c python:scal_app.web.gunicorn_conf scal_main:app
@@ -0,0 +1,9 @@
+"""Point the app at a throwaway data directory before anything imports it."""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# scal_app.config creates BASE and its subdirectories at import time.
+os.environ.setdefault("SCAL_DATA_DIR", tempfile.mkdtemp(prefix="scal-test-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,34 @@
+import copy
+import json
+
+import pytest
+
+from scal_app import config
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.yaml"
+    monkeypatch.setattr(config, "CONFIG_PATH", path)
+    saved = copy.deepcopy(config.CFG)
+    yield path
+    config.CFG.clear()
+    config.CFG.update(saved)
+
+
+def test_reload_restores_defaults_for_removed_keys(config_file):
+    default = config.DEFAULT_CFG["photos"]["max_batch_files"]
+    config_file.write_text(json.dumps({"photos": {"max_batch_files": default + 7}}))
+    assert config.reload_config()["photos"]["max_batch_files"] == default + 7
+    assert config.DEFAULT_CFG["photos"]["max_batch_files"] == default
+
+    config_file.write_text(json.dumps({"photos": {}}))
+    assert config.reload_config()["photos"]["max_batch_files"] == default
+
+
+def test_load_config_leaves_defaults_untouched(config_file):
+    defaults = {"stream": {"timeout": 20, "intervals": {"bus": 30}}}
+    config_file.write_text(json.dumps({"stream": {"intervals": {"bus": 5}}}))
+    merged = config.load_config(defaults)
+    assert merged["stream"] == {"timeout": 20, "intervals": {"bus": 5}}
+    assert defaults["stream"]["intervals"] == {"bus": 30}
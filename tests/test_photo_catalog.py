@@ -0,0 +1,110 @@
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from scal_app.services.photo_catalog import PhotoCatalog
+
+
+def _photo(path, color=(200, 30, 30), size=(64, 48)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, color).save(path, format="JPEG")
+    return path
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "photos"
+    for name in ("a.jpg", "b.jpg", "c.jpg", "trip/d.jpg", "trip/e.jpg"):
+        _photo(root / name)
+    catalog = PhotoCatalog(tmp_path / "catalog.sqlite3", root)
+    # Reconcile up front so ensure_ready() never races a background pass.
+    catalog.reconcile()
+    return catalog
+
+
+def test_page_walks_names_in_order(library):
+    version, first, following = library.page(limit=2)
+    assert first == ["a.jpg", "b.jpg"]
+    assert following == "b.jpg"
+    _, second, following = library.page(after=following, limit=2)
+    assert second == ["c.jpg", "trip/d.jpg"]
+    _, last, following = library.page(after=following, limit=2)
+    assert last == ["trip/e.jpg"]
+    assert following is None
+    assert version == library.version
+
+
+def test_page_filters_by_album_with_detail(library):
+    _, entries, following = library.page(album="trip", detail=True)
+    assert [entry["name"] for entry in entries] == ["trip/d.jpg", "trip/e.jpg"]
+    assert following is None
+    assert (entries[0]["width"], entries[0]["height"]) == (64, 48)
+    _, root_only, _ = library.page(album="")
+    assert root_only == ["a.jpg", "b.jpg", "c.jpg"]
+
+
+def test_changes_since_reports_adds_and_removals(library):
+    since = library.version
+    assert library.changes_since(since) == {"version": since, "added": [], "removed": []}
+    library.upsert(_photo(library.root / "trip/f.jpg"))
+    (library.root / "b.jpg").unlink()
+    library.remove(library.root / "b.jpg")
+    delta = library.changes_since(since)
+    assert delta["version"] > since
+    assert delta["added"] == ["trip/f.jpg"]
+    assert delta["removed"] == ["b.jpg"]
+    trip = library.changes_since(since, album="trip", detail=True)
+    assert [entry["name"] for entry in trip["added"]] == ["trip/f.jpg"]
+    assert trip["removed"] == []
+
+
+def test_changes_since_rejects_unknown_versions(library):
+    assert library.changes_since(library.version + 1) is None
+
+
+def test_reconcile_picks_up_outside_changes(library):
+    since = library.version
+    _photo(library.root / "trip/g.jpg")
+    os.remove(library.root / "c.jpg")
+    assert library.reconcile(full=False) == 2
+    delta = library.changes_since(since)
+    assert delta["added"] == ["trip/g.jpg"]
+    assert delta["removed"] == ["c.jpg"]
+
+
+def test_full_scan_finds_files_rewritten_in_place(library):
+    path = library.root / "a.jpg"
+    before = library.get("a.jpg")["hash"]
+    dir_mtime = path.parent.stat().st_mtime_ns
+    _photo(path, color=(10, 200, 10), size=(48, 64))
+    assert path.parent.stat().st_mtime_ns == dir_mtime
+    # The directory did not change, so an incremental pass cannot see it.
+    assert library.reconcile(full=False) == 0
+    assert library.reconcile(full=True) == 1
+    row = library.get("a.jpg")
+    assert row["hash"] != before
+    assert (row["width"], row["height"]) == (48, 64)
+
+
+def test_details_returns_only_the_requested_photos(library):
+    found = library.details(["trip/e.jpg", "a.jpg", "missing.jpg", "a.jpg"])
+    assert sorted(found) == ["a.jpg", "trip/e.jpg"]
+    assert found["a.jpg"]["width"] == 64
+    assert library.details([]) == {}
+
+
+def test_first_query_waits_for_the_initial_reconcile(tmp_path):
+    root = tmp_path / "photos"
+    for name in ("a.jpg", "trip/b.jpg"):
+        _photo(root / name)
+    catalog = PhotoCatalog(tmp_path / "catalog.sqlite3", root, ready_timeout=30)
+    assert catalog.listing()[1] == ["a.jpg", "trip/b.jpg"]
+
+    # Once reconciled, a new process answers from the index without waiting.
+    again = PhotoCatalog(tmp_path / "catalog.sqlite3", root, ready_timeout=30)
+    again.reconcile = lambda **_: time.sleep(2)
+    started = time.monotonic()
+    assert again.listing()[1] == ["a.jpg", "trip/b.jpg"]
+    assert time.monotonic() - started < 1
@@ -0,0 +1,70 @@
+from PIL import Image, ImageChops, ImageOps
+
+from scal_app.services.photos import (
+    FRAME_CANVAS_HEIGHT,
+    FRAME_CANVAS_WIDTH,
+    rotate_photo_file,
+)
+
+_ORIENTATION = 0x0112
+
+
+def _canvas_jpeg(path):
+    img = Image.new("RGB", (FRAME_CANVAS_WIDTH, FRAME_CANVAS_HEIGHT), (240, 240, 240))
+    img.paste((200, 0, 0), (0, 0, FRAME_CANVAS_WIDTH // 2, 200))
+    img.paste((0, 0, 200), (0, FRAME_CANVAS_HEIGHT - 300, FRAME_CANVAS_WIDTH, FRAME_CANVAS_HEIGHT))
+    img.save(path, format="JPEG", quality=90)
+    return path
+
+
+def _scan_data(path):
+    data = path.read_bytes()
+    return data[data.index(b"\xff\xda"):]
+
+
+def _displayed(path):
+    with Image.open(path) as img:
+        return ImageOps.exif_transpose(img).convert("RGB")
+
+
+def _orientation(path):
+    with Image.open(path) as img:
+        return img.getexif().get(_ORIENTATION, 1)
+
+
+def test_canvas_rotation_only_rewrites_exif(tmp_path):
+    path = _canvas_jpeg(tmp_path / "photo.jpg")
+    scan = _scan_data(path)
+    expected = _displayed(path).rotate(90, expand=True)
+
+    assert rotate_photo_file(path, 90) == 90
+
+    assert _scan_data(path) == scan
+    assert _orientation(path) != 1
+    shown = _displayed(path)
+    assert shown.size == (FRAME_CANVAS_HEIGHT, FRAME_CANVAS_WIDTH)
+    assert ImageChops.difference(shown, expected).getbbox() is None
+
+
+def test_canvas_rotation_round_trip_is_lossless(tmp_path):
+    path = _canvas_jpeg(tmp_path / "photo.jpg")
+    scan = _scan_data(path)
+    original = _displayed(path)
+
+    for angle in (90, 180, -90, 270, 270):
+        rotate_photo_file(path, angle)
+        assert _scan_data(path) == scan
+
+    assert _orientation(path) == 1
+    assert ImageChops.difference(_displayed(path), original).getbbox() is None
+
+
+def test_other_sizes_are_re_encoded(tmp_path):
+    path = tmp_path / "small.jpg"
+    Image.new("RGB", (300, 200), (10, 120, 10)).save(path, format="JPEG")
+    scan = _scan_data(path)
+
+    assert rotate_photo_file(path, 90) == 90
+
+    assert _scan_data(path) != scan
+    assert _orientation(path) == 1
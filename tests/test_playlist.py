@@ -0,0 +1,58 @@
+from scal_app.services.playlist import parse_cursor, window
+
+
+def _photos(count):
+    return [f"p{i:03d}.jpg" for i in range(count)]
+
+
+def test_parse_cursor_falls_back_to_start():
+    assert parse_cursor("3.abc") == (3, "abc")
+    assert parse_cursor("") == (0, "")
+    assert parse_cursor("x.abc") == (0, "")
+    assert parse_cursor("-2.abc") == (0, "abc")
+
+
+def test_window_is_deterministic_per_seed():
+    entries = _photos(20)
+    first, cursor = window(entries, seed="frame", cursor="", count=5)
+    again, again_cursor = window(entries, seed="frame", cursor="", count=5)
+    other, _ = window(entries, seed="other", cursor="", count=20)
+    assert list(first) == list(again)
+    assert cursor == again_cursor
+    assert sorted(list(other)) == list(entries)
+
+
+def test_window_pages_through_a_cycle_without_repeats():
+    entries = _photos(12)
+    seen, cursor = [], ""
+    for _ in range(3):
+        items, cursor = window(entries, seed="s", cursor=cursor, count=4)
+        seen.extend(list(items))
+    assert sorted(seen) == list(entries)
+    assert cursor.startswith("0.")
+
+
+def test_window_wraps_into_a_reshuffled_cycle():
+    entries = _photos(10)
+    whole, _ = window(entries, seed="s", cursor="", count=10)
+    items, cursor = window(entries, seed="s", cursor="", count=15)
+    assert list(items[:10]) == list(whole)
+    assert cursor.startswith("1.")
+    next_cycle, _ = window(entries, seed="s", cursor="1.", count=10)
+    assert list(items[10:]) == list(next_cycle)[:5]
+
+
+def test_window_order_survives_added_and_removed_photos():
+    entries = _photos(30)
+    first, cursor = window(entries, seed="s", cursor="", count=10)
+    rest, _ = window(entries, seed="s", cursor=cursor, count=20)
+    removed = list(rest)[3]
+    changed = [e for e in entries if e != removed] + ["new.jpg"]
+    after, _ = window(changed, seed="s", cursor=cursor, count=30)
+    expected = [name for name in list(rest) if name != removed]
+    assert [name for name in list(after) if name != "new.jpg"][:len(expected)] == expected
+    assert not set(list(first)) & set(list(after)[:len(expected)])
+
+
+def test_window_on_empty_catalog_keeps_cursor():
+    assert window([], seed="s", cursor="2.abc", count=5) == ([], "2.abc")
@@ -0,0 +1,42 @@
+import threading
+
+from scal_app.web.stream import WidgetHub
+
+
+def test_try_subscribe_never_passes_the_limit():
+    hub = WidgetHub(keepalive=0.1, max_subscribers=3)
+    hub.register("verse", lambda: {"text": "hi"}, 60)
+    barrier = threading.Barrier(20)
+    opened = []
+
+    def connect():
+        barrier.wait()
+        frames = hub.try_subscribe()
+        if frames is not None:
+            opened.append(frames)
+
+    threads = [threading.Thread(target=connect) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 3
+    assert hub.subscribers == 3
+    assert hub.try_subscribe() is None
+    for frames in opened:
+        frames.close()
+    assert hub.subscribers == 0
+
+
+def test_closing_releases_the_slot_once():
+    hub = WidgetHub(keepalive=0.1, max_subscribers=1)
+    frames = hub.try_subscribe()
+    assert next(frames) == "retry: 5000\n\n"
+    frames.close()
+    frames.close()
+    assert hub.subscribers == 0
+    # A stream closed before it was ever read gives its slot back too.
+    unread = hub.try_subscribe()
+    assert unread is not None
+    unread.close()
+    assert hub.subscribers == 0